@@ -14,18 +14,64 @@ from .abdutil import (
     ReadImage,
     SaveImage,
     HandleError,
+    AbdutilsError,
+    RaiseErrors,
     ConvertToGrayscale,
     ConvertToRGB,
     CropImage,
     GetImageSize,
     ResizeImage,
+    ResizePyramid,
     GaussianBlurImage,
     ConvertImageToGrayscale,
     SharpenImage,
     DetectEdgesInImage,
+    DetectEdges,
+    DetectEdgesBatch,
     ConvolveImage,
     ApplyFilter,
     ShowImage,
     CV2PIL,
     PIL2CV2,
+    SwapRB,
+    AsArray,
+    AsPIL,
+    StackBrighterImages,
+    ShowUsage,
+    LookForKeys,
 )
+
+from .abdops import ImageOps
+from .abdbuffers import BufferPool
+from .abdshm import SharedImageRing, SharedImage
+from .abdmonitor import (
+    SystemSampler,
+    GetSystemUsage,
+    PrometheusExporter,
+    TimeSeriesWriter,
+    StatusLine,
+    IncrementCounter,
+    SetCounter,
+    GetCounters,
+)
+from .abdparallel import (
+    AvailableCPUs,
+    AvailableMemory,
+    RecommendWorkers,
+    OpenCVThreads,
+    ParallelMap,
+    ShardItems,
+    ShardFromEnvironment,
+    FileSizes,
+)
+from .abdjobs import (
+    JobJournal,
+    RunJob,
+    EnableGracefulStop,
+    DisableGracefulStop,
+    StopRequested,
+    RequestStop,
+    ResetStop,
+)
+from .abdstats import EnableStats, DisableStats, ResetStats, GetStats, PrintStats, stats
+from .abdtiles import OpenImageMemmap, CreateImageMemmap, ProcessImageTiled
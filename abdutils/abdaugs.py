@@ -1,78 +1,686 @@
+import os
+import math
 import random
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import cv2
 import numpy as np
 from PIL import Image
-import imgaug.augmenters as iaa
 
+from .abdparallel import AvailableCPUs, RecommendWorkers
 
-# Augmentation class for simulating weather effects using imgaug
-class SnowAugmentation(object):
-    def __init__(self, probability=0.3, flake_size=(0.1, 0.4), speed=(0.01, 0.05)):
-        self.probability = probability
-        self.flake_size = flake_size
-        self.speed = speed
-        self.func = iaa.Snowflakes(flake_size=self.flake_size, speed=self.speed)
+# imgaug is optional and slow to import; it is only loaded for backend='imgaug'
+iaa = None
 
-    def __call__(self, image):
-        if random.random() < self.probability:
-            image = np.array(image)
-            image = image.astype(np.uint8)
+AUGMENTATION_BACKENDS = ('numpy', 'imgaug')
 
-            augmented_image = self.func(image=image)
-            augmented_image = Image.fromarray(augmented_image)
 
-            return augmented_image
-        else:
-            return image
+def _imgaug():
+    global iaa
+    if iaa is None:
+        try:
+            import imgaug.augmenters as augmenters
+        except ImportError:
+            raise ImportError("backend='imgaug' requires the 'imgaug' package (pip install imgaug).")
+        iaa = augmenters
+    return iaa
+
+
+# Instances without an explicit seed; they are reseeded in forked children so that worker
+# processes do not repeat the parent's (and each other's) augmentations
+_unseeded = weakref.WeakSet()
+
+
+def _reseed_after_fork():
+    for augmentation in list(_unseeded):
+        augmentation._random.seed()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reseed_after_fork)
 
-class RainAugmentation(object):
-    def __init__(self, probability=0.3, intensity_range=(0.1, 0.3)):
-        self.probability = probability
-        self.intensity_range = intensity_range
-        self.func = iaa.Rain(drop_size=(0.1, 0.2), speed=(0.1, 0.3))
 
-    def __call__(self, image):
-        if random.random() < self.probability:
-            image = np.array(image)
-            image = image.astype(np.uint8)
+def _sample_rng(seed):
+    # Independent generator for one sample; 'seed' is an int, a tuple of ints or a SeedSequence
+    return np.random.default_rng(list(seed) if isinstance(seed, tuple) else seed)
 
-            augmented_image = self.func(image=image)
-            augmented_image = Image.fromarray(augmented_image)
 
-            return augmented_image
+def _uniform(rng, value):
+    # A (low, high) range is sampled, a single number is used as it is
+    if isinstance(value, (tuple, list)):
+        return float(rng.uniform(value[0], value[1]))
+    return float(value)
+
+
+def _value_noise(height, width, rng, cells=4, octaves=4, persistence=0.5):
+    """
+    Multi-octave value noise of shape (height, width), standardized to zero mean and unit variance.
+    Each octave is a random grid with twice the cells of the previous one ('cells' across the
+    shorter side for the first), upsampled bicubically; octave weights fall by 'persistence'.
+    """
+    noise = np.zeros((height, width), dtype=np.float32)
+    short_side = min(height, width)
+    amplitude = 1.0
+    for octave in range(octaves):
+        step = short_side / (cells * 2 ** octave)
+        grid = rng.random((int(math.ceil(height / step)) + 2, int(math.ceil(width / step)) + 2), dtype=np.float32)
+        noise += amplitude * cv2.resize(grid, (width, height), interpolation=cv2.INTER_CUBIC)
+        amplitude *= persistence
+    noise -= noise.mean()
+    noise /= max(float(noise.std()), 1e-6)
+    return noise
+
+
+def _line_kernel(length, angle):
+    """
+    Normalized motion-blur kernel: a line of 'length' pixels at 'angle' degrees from vertical.
+    """
+    size = max(1, int(length)) | 1
+    kernel = np.zeros((size, size), dtype=np.float32)
+    center = size // 2
+    dx = int(round(math.sin(math.radians(angle)) * center))
+    dy = int(round(math.cos(math.radians(angle)) * center))
+    cv2.line(kernel, (center - dx, center - dy), (center + dx, center + dy), 1.0, 1, cv2.LINE_AA)
+    return kernel / kernel.sum()
+
+
+def _alpha_layer(alpha, color):
+    # (inverse alpha, added color, floor) uint8 maps for image * (1 - alpha) + color * alpha
+    np.clip(alpha, 0.0, 1.0, out=alpha)
+    inverse = cv2.convertScaleAbs(alpha, alpha=-255.0, beta=255.0)
+    add = cv2.convertScaleAbs(alpha * color)
+    return cv2.cvtColor(inverse, cv2.COLOR_GRAY2RGB), cv2.cvtColor(add, cv2.COLOR_GRAY2RGB), None
+
+
+def _fit_channels(layer, image):
+    # An HxWx3 layer map shaped like 'image' (grayscale images use the first channel)
+    if layer is None:
+        return None
+    if image.ndim == 2 or image.shape[2] == 1:
+        layer = layer[..., 0]
+    return np.ascontiguousarray(layer).reshape(image.shape)
+
+
+def _blend(image, layer, dst=None):
+    """
+    Apply a weather layer: max(image * inverse_alpha / 255 + added_color, floor), saturated.
+    RGBA images get the weather on the color channels and keep their alpha channel.
+    """
+    if image.ndim == 3 and image.shape[2] == 4:
+        if dst is None:
+            dst = image.copy()
         else:
-            return image
+            dst[...] = image
+        dst[..., :3] = _blend(np.ascontiguousarray(image[..., :3]), layer)
+        return dst
+
+    inverse, add, floor = (_fit_channels(part, image) for part in layer)
+    if inverse is not None:
+        dst = cv2.multiply(image, inverse, dst=dst, scale=1.0 / 255)
+        cv2.add(dst, add, dst=dst)
+    else:
+        dst = cv2.add(image, add, dst=dst)
+    if floor is not None:
+        cv2.max(dst, floor, dst=dst)
+    return dst
+
 
-class FogAugmentation(object):
-    def __init__(self, probability=0.3):
+class AugmentationCache(object):
+    """
+    An LRU cache of augmented images keyed by (image id, seed, augmentation parameters), so epochs
+    that replay the same seeds for the same images skip the augmentation.
+
+    Example:
+        cache = AugmentationCache(max_items=10000)
+        snow = SnowAugmentation(probability=0.5, cache=cache)
+        image = snow(image, seed=epoch_seed + index, image_id=index)
+    """
+
+    def __init__(self, max_items=1024, max_bytes=None):
+        """
+        Args:
+            max_items (int): Maximum number of cached images. Defaults to 1024.
+            max_bytes (int): Optional limit on the total size of the cached images.
+        """
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def Get(self, key):
+        with self._lock:
+            array = self._items.get(key)
+            if array is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return array
+
+    def Put(self, key, array):
+        array = np.array(array)
+        array.flags.writeable = False
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.nbytes
+            self._items[key] = array
+            self.bytes += array.nbytes
+            while self._items and (len(self._items) > self.max_items or
+                                   (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= evicted.nbytes
+
+    def Clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def Stats(self):
+        with self._lock:
+            return {'items': len(self._items), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self._items)
+
+
+# Base class for the weather augmentations: gates each image on the probability and draws a
+# weather layer per image that fires, with NumPy/OpenCV or (backend='imgaug') with imgaug.
+# Every sample gets its own random generator, derived from the call's seed= or else from
+# the instance's generator (seed= in the constructor).
+class WeatherAugmentation(object):
+    def __init__(self, probability=0.3, backend='numpy', seed=None, cache=None):
+        if backend not in AUGMENTATION_BACKENDS:
+            raise ValueError(f"Unsupported backend: {backend}. Please use 'numpy' or 'imgaug'.")
         self.probability = probability
-        self.func = iaa.Fog()
+        self.backend = backend
+        self.seed = seed
+        self.cache = cache
+        self.func = None
+        self._random = random.Random(seed)
+        if seed is None:
+            _unseeded.add(self)
 
-    def __call__(self, image):
-        if random.random() < self.probability:
-            image = np.array(image)
-            image = image.astype(np.uint8)
+    def _params(self):
+        # Public settings that determine the output (used in cache keys)
+        def describe(value):
+            if isinstance(value, WeatherAugmentation):
+                return value._params_key()
+            if isinstance(value, list):
+                return tuple(describe(item) for item in value)
+            return value
+        return {key: describe(value) for key, value in vars(self).items()
+                if not key.startswith('_') and key not in ('func', 'cache', 'seed')}
 
-            augmented_image = self.func(image=image)
-            augmented_image = Image.fromarray(augmented_image)
+    def _params_key(self):
+        # Recomputed on every use, so changing a setting after construction changes the key
+        params = repr(sorted(self._params().items()))
+        return type(self).__name__ + '_' + hashlib.md5(params.encode()).hexdigest()[:8]
 
-            return augmented_image
-        else:
+    def _plan(self, rng):
+        # What to do with one sample, decided before any conversion; None leaves it untouched
+        return self._forced_plan(rng) if rng.random() < self.probability else None
+
+    def _forced_plan(self, rng):
+        # The plan when the augmentation is applied regardless of its probability (RandomChoice)
+        return True
+
+    def _augment(self, images, rngs, plans=None):
+        # images: uint8 NHWC array or list of HWC arrays (one generator each); returns the same container
+        if self.func is not None:
+            # imgaug draws the whole batch from one stream, seeded from the samples' generators
+            self.func.seed_(int(np.random.SeedSequence([int(rng.integers(2 ** 32)) for rng in rngs]).generate_state(1)[0]))
+            return self.func(images=images)
+        if isinstance(images, np.ndarray):
+            output = np.empty_like(images)
+            for index in range(len(images)):
+                _blend(images[index], self._layer(images.shape[1], images.shape[2], rngs[index]), dst=output[index])
+            return output
+        return [_blend(image, self._layer(image.shape[0], image.shape[1], rng)) for image, rng in zip(images, rngs)]
+
+    def _layer(self, height, width, rng):
+        """
+        One weather layer as uint8 (inverse alpha, added color, floor) maps of HxWx3, such that
+        augmented = max(image * inverse_alpha / 255 + added_color, floor). inverse_alpha and floor
+        may be None (no attenuation, no floor).
+        """
+        if self.func is not None:
+            return self._probe_layer(height, width, rng)
+        return self._draw_layer(height, width, rng)
+
+    def _draw_layer(self, height, width, rng):
+        raise NotImplementedError
+
+    def _probe_layer(self, height, width, rng):
+        # One deterministic draw of the imgaug augmenter on a black and a white image,
+        # which recovers the layer exactly for alpha-blended effects (Rain, Fog, Clouds)
+        self.func.seed_(int(rng.integers(2 ** 31)))
+        func = self.func.to_deterministic()
+        black = func(image=np.zeros((height, width, 3), dtype=np.uint8))
+        white = func(image=np.full((height, width, 3), 255, dtype=np.uint8))
+        return cv2.subtract(white, black), black, None
+
+    def _sample_seeds(self, seed, count):
+        if seed is None:
+            return [self._random.getrandbits(64) for _ in range(count)]
+        if isinstance(seed, (list, tuple, np.ndarray)):
+            if len(seed) != count:
+                raise ValueError(f"Got {len(seed)} seeds for {count} images.")
+            return list(seed)
+        return [seed] if count == 1 else [(seed, index) for index in range(count)]
+
+    def __call__(self, image, seed=None, image_id=None):
+        """
+        Augment a PIL Image, an HxWxC array, an NxHxWxC batch or a list of images.
+        Each image is augmented with the probability of the instance, and the result has
+        the same type as the input (images that are not augmented are returned as they are).
+
+        Args:
+            image: The image(s) to augment.
+            seed (int or list): Makes the result reproducible: one seed for an image, and for a batch
+                                either one seed (each image gets its own stream) or a list of seeds.
+            image_id (hashable or list): Identifies the image(s) for the cache; outputs are only
+                                         cached when both 'seed' and 'image_id' are given.
+        """
+        batch = (isinstance(image, np.ndarray) and image.ndim == 4) or isinstance(image, (list, tuple))
+        count = len(image) if batch else 1
+        seeds = self._sample_seeds(seed, count)
+        ids = (list(image_id) if batch else [image_id]) if image_id is not None else [None] * count
+        rngs = [_sample_rng(sample_seed) for sample_seed in seeds]
+        plans = [self._plan(rng) for rng in rngs]
+        fire = [index for index in range(count) if plans[index] is not None]
+
+        items = image if batch else [image]
+        results = {}
+        params_key = self._params_key() if self.cache is not None and seed is not None else None
+        if params_key is not None:
+            for index in list(fire):
+                if ids[index] is not None:
+                    cached = self.cache.Get((ids[index], seeds[index], params_key))
+                    if cached is not None:
+                        results[index] = cached
+                        fire.remove(index)
+
+        if fire:
+            if isinstance(image, np.ndarray) and batch:
+                arrays = np.ascontiguousarray(image[fire], dtype=np.uint8)
+            else:
+                arrays = [np.asarray(items[index], dtype=np.uint8) for index in fire]
+            augmented = self._augment(arrays, [rngs[index] for index in fire], [plans[index] for index in fire])
+            for index, array in zip(fire, augmented):
+                results[index] = array
+                if params_key is not None and ids[index] is not None:
+                    self.cache.Put((ids[index], seeds[index], params_key), array)
+
+        if not results:
             return image
+        if isinstance(image, np.ndarray) and batch:
+            output = image.copy()
+            for index, array in results.items():
+                output[index] = array
+            return output
+        output = list(items)
+        for index, array in results.items():
+            if isinstance(items[index], Image.Image):
+                output[index] = Image.fromarray(array)
+            else:
+                output[index] = array.copy() if not array.flags.writeable else array
+        return output if batch else output[0]
 
-class CloudsAugmentation(object):
-    def __init__(self, probability=0.3):
-        self.probability = probability
-        self.func = iaa.Clouds()
+    def Map(self, images, workers=None, seed=None, chunk_size=16):
+        """
+        Augment a list of images or an NxHxWxC batch across a pool of worker processes.
 
-    def __call__(self, image):
-        if random.random() < self.probability:
-            image = np.array(image)
-            image = image.astype(np.uint8)
+        Every image gets its own seed spawned from 'seed' (or from the instance's generator), so the
+        results do not depend on the number of workers or on the chunking.
 
-            augmented_image = self.func(image=image)
-            augmented_image = Image.fromarray(augmented_image)
+        Args:
+            images (list or numpy.ndarray): The images to augment.
+            workers (int): Number of worker processes. Defaults to RecommendWorkers('cpu').
+            seed (int): Seed for the whole call. Defaults to None.
+            chunk_size (int): Images sent to a worker at a time. Defaults to 16.
 
-            return augmented_image
+        Returns:
+            list or numpy.ndarray: The augmented images, in order.
+        """
+        if seed is None:
+            seed = self._random.getrandbits(64)
+        seeds = [int(value) for value in np.random.SeedSequence(seed).generate_state(len(images), dtype=np.uint64)]
+        chunks = [(images[start:start + chunk_size], seeds[start:start + chunk_size])
+                  for start in range(0, len(images), chunk_size)]
+
+        if workers is None:
+            workers = RecommendWorkers('cpu', max_workers=len(chunks))
+        if workers <= 1 or len(chunks) <= 1:
+            results = [self(chunk, seed=chunk_seeds) for chunk, chunk_seeds in chunks]
         else:
-            return image
+            # Each process gets its share of the CPUs for OpenCV's own threads
+            threads = max(1, int(AvailableCPUs() // workers))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self, threads)) as executor:
+                results = list(executor.map(_map_chunk, chunks))
+
+        if isinstance(images, np.ndarray):
+            return np.concatenate(results) if results else images[:0].copy()
+        return [image for chunk in results for image in chunk]
+
+    def __getstate__(self):
+        # Locks cannot be pickled and caches stay with the parent process
+        state = self.__dict__.copy()
+        state.pop('_lock', None)
+        state['cache'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        if self.seed is None:
+            _unseeded.add(self)
+
+
+# The augmentation used by a Map worker process, installed once per worker
+_worker_augmentation = None
+
+
+def _init_worker(augmentation, threads):
+    global _worker_augmentation
+    _worker_augmentation = augmentation
+    cv2.setNumThreads(threads)
+
+
+def _map_chunk(chunk):
+    images, seeds = chunk
+    return _worker_augmentation(images, seed=seeds)
+
+
+# Augmentation classes for simulating weather effects
+class SnowAugmentation(WeatherAugmentation):
+    def __init__(self, probability=0.3, flake_size=(0.1, 0.4), speed=(0.01, 0.05), backend='numpy', seed=None, cache=None):
+        super().__init__(probability, backend, seed, cache)
+        self.flake_size = flake_size
+        self.speed = speed
+        if backend == 'imgaug':
+            self.func = _imgaug().Snowflakes(flake_size=self.flake_size, speed=self.speed)
+
+    def _draw_layer(self, height, width, rng):
+        # Gaussian flake sprites stamped at random positions in three depth planes (small and dim
+        # far away, large and bright up close), then motion-blurred along the fall direction
+        scale = min(height, width) / 256.0
+        flake_size = _uniform(rng, self.flake_size)
+        flakes = np.zeros((height, width), dtype=np.float32)
+        for depth, (density, brightness) in enumerate(((0.004, 0.6), (0.0015, 0.85), (0.0005, 1.0))):
+            seeds = np.zeros((height, width), dtype=np.float32)
+            count = rng.binomial(height * width, density * (0.5 + flake_size))
+            seeds[rng.integers(0, height, count), rng.integers(0, width, count)] = rng.uniform(0.7, 1.0, count) * brightness
+            sigma = max(0.4, (0.4 + 2.0 * flake_size) * (depth + 1) * 0.5 * scale)
+            sprite = cv2.getGaussianKernel(2 * int(math.ceil(2.5 * sigma)) + 1, sigma, cv2.CV_32F)
+            sprite = sprite @ sprite.T
+            sprite /= sprite.max()
+            np.maximum(flakes, cv2.filter2D(seeds, -1, sprite), out=flakes)
+
+        speed = _uniform(rng, self.speed)
+        length = 1 + speed * 60 * scale
+        if length >= 2:
+            flakes = cv2.filter2D(flakes, -1, _line_kernel(length, rng.uniform(-30, 30)) * (length ** 0.5))
+
+        floor = cv2.convertScaleAbs(flakes, alpha=255.0)
+        # Faint glow added under the flakes, as imgaug does
+        glow = cv2.convertScaleAbs(floor, alpha=(0.1 + 20 * speed) / (1.0 + 20 * speed))
+        return None, cv2.cvtColor(glow, cv2.COLOR_GRAY2RGB), cv2.cvtColor(floor, cv2.COLOR_GRAY2RGB)
+
+    def _probe_layer(self, height, width, rng):
+        # imgaug adds a faint glow of the flakes ((0.1 + 20 * speed) * noise) and then takes the
+        # maximum with the flakes ((1 + 20 * speed) * noise). On black the result is the flakes,
+        # the glow is derived from them at the mean speed.
+        self.func.seed_(int(rng.integers(2 ** 31)))
+        func = self.func.to_deterministic()
+        flakes = func(image=np.zeros((height, width, 3), dtype=np.uint8))
+        speed = sum(self.speed) / 2.0 if isinstance(self.speed, (tuple, list)) else float(self.speed)
+        glow = cv2.convertScaleAbs(flakes, alpha=(0.1 + 20 * speed) / (1.0 + 20 * speed))
+        return None, glow, flakes
+
+class RainAugmentation(WeatherAugmentation):
+    def __init__(self, probability=0.3, intensity_range=(0.1, 0.3), backend='numpy', seed=None, cache=None):
+        super().__init__(probability, backend, seed, cache)
+        self.intensity_range = intensity_range
+        if backend == 'imgaug':
+            self.func = _imgaug().Rain(drop_size=(0.1, 0.2), speed=(0.1, 0.3))
+
+    def _draw_layer(self, height, width, rng):
+        # Random drops smeared into streaks by a slanted motion-blur kernel, over a light haze
+        scale = min(height, width) / 256.0
+        intensity = _uniform(rng, self.intensity_range)
+        drops = np.zeros((height, width), dtype=np.float32)
+        count = rng.binomial(height * width, 0.01 * intensity)
+        drops[rng.integers(0, height, count), rng.integers(0, width, count)] = rng.uniform(0.5, 1.0, count)
+
+        length = max(3.0, rng.uniform(12, 30) * scale)
+        streaks = cv2.filter2D(drops, -1, _line_kernel(length, rng.uniform(-15, 15)) * length)
+        streaks = cv2.GaussianBlur(streaks, (0, 0), 0.6 * max(scale, 1.0))
+
+        alpha = streaks * rng.uniform(0.5, 0.8) + rng.uniform(0.03, 0.1)
+        return _alpha_layer(alpha, np.float32(rng.uniform(180, 240)))
+
+class FogAugmentation(WeatherAugmentation):
+    def __init__(self, probability=0.3, backend='numpy', seed=None, cache=None):
+        super().__init__(probability, backend, seed, cache)
+        if backend == 'imgaug':
+            self.func = _imgaug().Fog()
+
+    def _draw_layer(self, height, width, rng):
+        # Dense, low-contrast haze: a high alpha that varies slowly across the image
+        alpha = _value_noise(height, width, rng, cells=2, octaves=3, persistence=0.5)
+        alpha *= rng.uniform(0.03, 0.08)
+        alpha += rng.uniform(0.5, 0.7)
+        color = _value_noise(height, width, rng, cells=8, octaves=2)
+        color *= 6.0
+        color += rng.uniform(225, 250)
+        return _alpha_layer(alpha, color)
+
+class CloudsAugmentation(WeatherAugmentation):
+    def __init__(self, probability=0.3, backend='numpy', seed=None, cache=None):
+        super().__init__(probability, backend, seed, cache)
+        if backend == 'imgaug':
+            self.func = _imgaug().Clouds()
+
+    def _draw_layer(self, height, width, rng):
+        # Patchy cover: multi-octave noise with more contrast and detail than fog
+        alpha = _value_noise(height, width, rng, cells=3, octaves=5, persistence=0.55)
+        alpha *= rng.uniform(0.1, 0.18)
+        alpha += rng.uniform(0.2, 0.4)
+        color = _value_noise(height, width, rng, cells=6, octaves=3)
+        color *= 12.0
+        color += rng.uniform(200, 245)
+        return _alpha_layer(alpha, color)
+
+
+class WeatherOverlayBank(WeatherAugmentation):
+    """
+    Fast version of a weather augmentation: a bank of weather layers is generated once per image
+    size (and optionally cached on disk as .npy files), and each image gets a random layer from
+    the bank, cropped at a random offset and optionally flipped, blended in with a few vectorized
+    uint8 operations.
+
+    A bank depends only on the augmentation's settings, the layer size, 'layers' and 'seed'
+    (0 when not given), never on the call history, so the same seed= gives the same output in
+    every process and run.
+
+    Example:
+        snow = WeatherOverlayBank(SnowAugmentation(probability=0.5), layers=32, cache_dir='weather_cache')
+        batch = snow(batch)
+    """
+
+    def __init__(self, augmentation, layers=16, margin=1.25, flip=True, cache_dir=None, probability=None, seed=None, cache=None):
+        """
+        Args:
+            augmentation (WeatherAugmentation): The augmentation whose layers are banked.
+            layers (int): Number of distinct layers generated per image size. Defaults to 16.
+            margin (float): Layers are this much larger than the images, which leaves room for
+                            random crop offsets. Defaults to 1.25.
+            flip (bool): Randomly mirror the layers horizontally. Defaults to True.
+            cache_dir (str): Optional folder to save the banks in and load them from (.npy).
+            probability (float): Probability of augmenting an image. Defaults to the augmentation's.
+            seed (int): Seed for the bank's layers and the per-image choices. Defaults to None
+                        (layers from seed 0, per-image choices unseeded).
+            cache (AugmentationCache): Optional cache of augmented images (see WeatherAugmentation).
+        """
+        super().__init__(augmentation.probability if probability is None else probability, seed=seed, cache=cache)
+        self.augmentation = augmentation
+        self.layers = layers
+        self.margin = margin
+        self.flip = flip
+        self.cache_dir = cache_dir
+        self._banks = {}
+        self._lock = threading.Lock()
+
+    def _params(self):
+        # The seed picks the bank's layers, so unlike other augmentations it changes the output
+        params = super()._params()
+        params['seed'] = self.seed or 0
+        return params
+
+    def _cache_key(self, height, width, params_key=None):
+        # Everything a bank is generated from; also its file name in 'cache_dir'
+        params_key = params_key or self.augmentation._params_key()
+        return f"{params_key}_{width}x{height}_{self.layers}_s{self.seed or 0}"
+
+    def _bank(self, height, width, params_key=None):
+        """
+        (inverse alpha, added color, floor) stacks of shape (layers, H, W, 3) for images of the
+        given size, generating (or loading) them on first use.
+        """
+        size = (int(math.ceil(height * self.margin)), int(math.ceil(width * self.margin)))
+        key = self._cache_key(size[0], size[1], params_key)
+        with self._lock:
+            bank = self._banks.get(key)
+            if bank is not None:
+                return bank
+
+            paths = [os.path.join(self.cache_dir, f"{key}_{name}.npy") for name in ('inverse', 'add', 'floor')] if self.cache_dir else None
+            if paths and os.path.exists(paths[1]):
+                bank = tuple(np.load(path, mmap_mode='r') if os.path.exists(path) else None for path in paths)
+            else:
+                # Seeded from the key, not from self._random, so the bank does not depend on
+                # which sizes this instance has seen before
+                rng = _sample_rng(int(hashlib.md5(key.encode()).hexdigest()[:16], 16))
+                generated = [self.augmentation._layer(size[0], size[1], rng) for _ in range(self.layers)]
+                bank = tuple(None if generated[0][index] is None else np.stack([layer[index] for layer in generated])
+                             for index in range(3))
+                if paths:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    # Each file is replaced atomically and 'add' (the one readers check for) goes
+                    # last, so concurrent workers never load a partial bank
+                    for index in (0, 2, 1):
+                        if bank[index] is not None:
+                            temporary = f"{paths[index]}.{os.getpid()}.{threading.get_ident()}.tmp"
+                            with open(temporary, 'wb') as handle:
+                                np.save(handle, bank[index])
+                            os.replace(temporary, paths[index])
+
+            self._banks[key] = bank
+            return bank
+
+    def _composite(self, image, rng, dst=None, params_key=None):
+        height, width = image.shape[:2]
+        bank = self._bank(height, width, params_key)
+        index = int(rng.integers(len(bank[1])))
+        top = int(rng.integers(bank[1].shape[1] - height + 1))
+        left = int(rng.integers(bank[1].shape[2] - width + 1))
+        flip = self.flip and rng.random() < 0.5
+
+        def crop(stack):
+            if stack is None:
+                return None
+            window = stack[index, top:top + height, left:left + width]
+            return cv2.flip(window, 1) if flip else window
+
+        return _blend(image, tuple(crop(stack) for stack in bank), dst=dst)
+
+    def _augment(self, images, rngs, plans=None):
+        # The augmentation's settings are hashed once per call, not per image
+        params_key = self.augmentation._params_key()
+        if isinstance(images, np.ndarray):
+            output = np.empty_like(images)
+            for index in range(len(images)):
+                self._composite(images[index], rngs[index], dst=output[index], params_key=params_key)
+            return output
+        return [self._composite(image, rng, params_key=params_key) for image, rng in zip(images, rngs)]
+
+
+class Compose(WeatherAugmentation):
+    """
+    Apply several augmentations in order. For each image it is decided up front which
+    augmentations fire (each with its own probability), so an image that gets none of them is
+    returned untouched, and the others are converted to an array once and pass through the
+    selected augmentations without further conversions.
+
+    Example:
+        weather = Compose([FogAugmentation(0.3), RainAugmentation(0.3), SnowAugmentation(0.1)], seed=0)
+        batch = weather(batch)
+        images = weather.Map(images, workers=8)
+    """
+
+    def __init__(self, transforms, probability=1.0, seed=None, cache=None):
+        """
+        Args:
+            transforms (list): The augmentations, applied in order.
+            probability (float): Probability of considering the transforms at all. Defaults to 1.0.
+            seed (int): Seed for the per-image decisions and effects. Defaults to None.
+            cache (AugmentationCache): Optional cache of augmented images.
+        """
+        super().__init__(probability, seed=seed, cache=cache)
+        self.transforms = list(transforms)
+
+    def _forced_plan(self, rng):
+        # (transform, its own plan) for every transform that fires, so nested containers
+        # get their selection rather than a bare True
+        selected = []
+        for transform in self.transforms:
+            plan = transform._plan(rng)
+            if plan is not None:
+                selected.append((transform, plan))
+        return selected or None
+
+    def _augment(self, images, rngs, plans=None):
+        output = np.empty_like(images) if isinstance(images, np.ndarray) else [None] * len(images)
+        for index in range(len(images)):
+            array = images[index]
+            for transform, plan in plans[index]:
+                array = transform._augment([array], [rngs[index]], [plan])[0]
+            output[index] = array
+        return output
+
+
+class RandomChoice(Compose):
+    """
+    Apply one augmentation per image, picked at random (optionally weighted). The picked
+    augmentation is applied regardless of its own probability.
+
+    Example:
+        weather = RandomChoice([FogAugmentation(), RainAugmentation(), SnowAugmentation()], probability=0.5)
+    """
+
+    def __init__(self, transforms, weights=None, probability=1.0, seed=None, cache=None):
+        """
+        Args:
+            transforms (list): The augmentations to choose from.
+            weights (list): Relative chance of each augmentation. Defaults to equal chances.
+            probability (float): Probability of augmenting an image at all. Defaults to 1.0.
+            seed (int): Seed for the per-image decisions and effects. Defaults to None.
+            cache (AugmentationCache): Optional cache of augmented images.
+        """
+        super().__init__(transforms, probability, seed, cache)
+        if weights is not None and len(weights) != len(self.transforms):
+            raise ValueError("Inputs 'transforms' and 'weights' must have the same length.")
+        self.weights = None if weights is None else [float(weight) for weight in weights]
+
+    def _forced_plan(self, rng):
+        weights = None if self.weights is None else np.asarray(self.weights) / sum(self.weights)
+        transform = self.transforms[int(rng.choice(len(self.transforms), p=weights))]
+        plan = transform._forced_plan(rng)
+        return None if plan is None else [(transform, plan)]
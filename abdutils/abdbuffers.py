@@ -0,0 +1,163 @@
+# https://github.com/abdkhanstd/abdutils
+import functools
+import threading
+import weakref
+from collections import defaultdict
+
+import numpy as np
+
+
+# Per-thread stack of (pool, arrays acquired in the block) for 'with pool:' blocks
+_active = threading.local()
+
+
+def _scopes():
+    stack = getattr(_active, 'scopes', None)
+    if stack is None:
+        stack = _active.scopes = []
+    return stack
+
+
+class BufferPool(object):
+    """
+    A pool of reusable NumPy arrays keyed by (shape, dtype), for loops that produce
+    many outputs of the same size (video frames, batches).
+
+    ResizeImage, ConvertToGrayscale, ConvertToRGB and ApplyFilter write their cv2 results
+    into a pooled array when given pool=, or when called inside a 'with pool:' block.
+    Arrays go back to the pool with Release(), or all at once when the 'with' block ends,
+    so results that must outlive the block have to be copied. The pool only keeps weak
+    references to arrays in use, so a result that is never released is simply freed.
+
+    Example:
+        pool = BufferPool()
+        for frame in frames:
+            with pool:
+                small = ResizeImage(frame, (640, 360), interpolation='CV_AREA', verbose=False)
+                gray = ConvertToGrayscale(small)
+                process(gray)
+        print(pool.Stats())
+    """
+
+    def __init__(self, max_free=8):
+        """
+        Args:
+            max_free (int): Maximum number of idle arrays kept per (shape, dtype). Defaults to 8.
+        """
+        self.max_free = max_free
+        self.allocations = 0
+        self.reuses = 0
+        self.bytes_reused = 0
+        self._free = defaultdict(list)
+        self._in_use = {}
+        self._lock = threading.Lock()
+
+    def Acquire(self, shape, dtype=np.uint8):
+        """
+        Get an array of the given shape and dtype, reusing a released one when possible.
+        The contents are undefined.
+        """
+        key = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            free = self._free[key]
+            if free:
+                array = free.pop()
+                self.reuses += 1
+                self.bytes_reused += array.nbytes
+            else:
+                array = np.empty(key[0], dtype=key[1])
+                self.allocations += 1
+            self._in_use[id(array)] = weakref.ref(array, functools.partial(self._forget, id(array)))
+        for pool, acquired in reversed(_scopes()):
+            if pool is self:
+                acquired.append(array)
+                break
+        return array
+
+    def Release(self, array):
+        """
+        Give an array obtained from Acquire back to the pool. Other arrays are ignored.
+        """
+        with self._lock:
+            self._release(array)
+
+    def _forget(self, key, ref):
+        # Called when an acquired array is garbage collected without being released; no lock,
+        # as the collector can run this while the same thread holds it
+        if self._in_use.get(key) is ref:
+            self._in_use.pop(key, None)
+
+    def _release(self, array):
+        ref = self._in_use.get(id(array))
+        if ref is None or ref() is not array:
+            return
+        del self._in_use[id(array)]
+        free = self._free[(array.shape, array.dtype)]
+        if len(free) < self.max_free:
+            free.append(array)
+
+    def Clear(self):
+        """
+        Drop all idle arrays so their memory can be freed.
+        """
+        with self._lock:
+            self._free.clear()
+
+    def Stats(self):
+        """
+        Returns:
+            dict: Counters: 'allocations', 'reuses' (allocations avoided), 'bytes_reused',
+                  'in_use' and 'free' arrays.
+        """
+        with self._lock:
+            return {
+                'allocations': self.allocations,
+                'reuses': self.reuses,
+                'bytes_reused': self.bytes_reused,
+                'in_use': len(self._in_use),
+                'free': sum(len(free) for free in self._free.values()),
+            }
+
+    def __enter__(self):
+        _scopes().append((self, []))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _, acquired = _scopes().pop()
+        with self._lock:
+            for array in acquired:
+                self._release(array)
+        return False
+
+    def __repr__(self):
+        stats = self.Stats()
+        return (f"BufferPool(allocations={stats['allocations']}, reuses={stats['reuses']}, "
+                f"in_use={stats['in_use']}, free={stats['free']})")
+
+
+def _active_pool(pool):
+    # 'pool' itself, or the pool of the enclosing 'with' block
+    if pool is None:
+        stack = _scopes()
+        pool = stack[-1][0] if stack else None
+    return pool
+
+
+def _with_pooled(pool, shape, dtype, func, *args, **kwargs):
+    """
+    func(*args, dst=<output array from the pool>, **kwargs), with dst=None (OpenCV allocates)
+    when no pool is given or active. If func fails, or ignores dst and returns a new array
+    (shape or dtype mismatch), the array goes straight back to the pool, so pools with a fixed
+    number of buffers (SharedImageRing) do not lose one.
+    """
+    pool = _active_pool(pool)
+    dst = None if pool is None else pool.Acquire(shape, dtype)
+    try:
+        result = func(*args, dst=dst, **kwargs)
+    except BaseException:
+        if dst is not None:
+            pool.Release(dst)
+        raise
+    if dst is not None and result is not dst:
+        pool.Release(dst)
+    return result
@@ -0,0 +1,308 @@
+# https://github.com/abdkhanstd/abdutils
+import json
+import os
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .abdutil import HandleError, ShowInfo, ShowWarning, check_required_args, get_caller_info
+
+
+class JobJournal(object):
+    """
+    An append-only record of the work items a batch job has completed, so that an interrupted
+    or crashed job can resume where it stopped instead of starting from zero.
+
+    Every completed item is one JSON line. Lines are flushed to the OS right away and fsync'ed
+    every 'fsync_every' items or 'fsync_interval' seconds, so a power cut loses at most that much
+    progress; a torn last line is ignored on the next open.
+
+    Example:
+        with JobJournal('resize.journal') as journal:
+            for path in journal.Pending(ReadDirectoryContents('/data/*.jpg')):
+                process(path)
+                journal.Done(path)
+    """
+
+    def __init__(self, path=None, fsync_every=100, fsync_interval=5.0, resume=True):
+        """
+        Args:
+            path (str): The journal file.
+            fsync_every (int): fsync after this many new items. Defaults to 100.
+            fsync_interval (float): fsync at least this often (seconds) while items arrive. Defaults to 5.0.
+            resume (bool): Load the items completed by earlier runs; False starts a new journal.
+                           Defaults to True.
+        """
+        if path is None:
+            raise ValueError("Please give the journal 'path'.")
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.completed = set()
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._synced_at = time.time()
+
+        if resume and os.path.exists(path):
+            with open(path, encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        self.completed.add(json.loads(line))
+                    except ValueError:
+                        # Torn write at the end of a crashed run
+                        continue
+        self._handle = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._handle.tell() > 0:
+            with open(path, 'rb') as handle:
+                handle.seek(-1, os.SEEK_END)
+                if handle.read(1) != b'\n':
+                    # Start after the torn line instead of extending it
+                    self._handle.write('\n')
+
+    @staticmethod
+    def Key(item):
+        """
+        The journal key of an item: strings as they are, anything else through str().
+        """
+        return item if isinstance(item, str) else str(item)
+
+    def Done(self, item):
+        """
+        Record 'item' as completed.
+        """
+        key = self.Key(item)
+        with self._lock:
+            if key in self.completed:
+                return
+            self.completed.add(key)
+            self._handle.write(json.dumps(key) + '\n')
+            self._handle.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.time() - self._synced_at >= self.fsync_interval:
+                self._sync()
+
+    def IsDone(self, item):
+        return self.Key(item) in self.completed
+
+    __contains__ = IsDone
+
+    def Pending(self, items):
+        """
+        Returns:
+            list: The items not completed yet, in their original order.
+        """
+        return [item for item in items if self.Key(item) not in self.completed]
+
+    def _sync(self):
+        os.fsync(self._handle.fileno())
+        self._unsynced = 0
+        self._synced_at = time.time()
+
+    def Flush(self):
+        """
+        Write everything recorded so far to disk (flush + fsync).
+        """
+        with self._lock:
+            if not self._handle.closed:
+                self._handle.flush()
+                self._sync()
+
+    def Close(self):
+        with self._lock:
+            if not self._handle.closed:
+                self._handle.flush()
+                self._sync()
+                self._handle.close()
+
+    def __len__(self):
+        return len(self.completed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+        return False
+
+    def __repr__(self):
+        return f"JobJournal('{self.path}', completed={len(self.completed)})"
+
+
+# Set by the graceful stop handler (first Ctrl+C / SIGTERM), checked by RunJob and user loops
+_stop_requested = threading.Event()
+_previous_handlers = {}
+
+
+def StopRequested():
+    """
+    Returns:
+        bool: True once a graceful stop was requested (Ctrl+C, SIGTERM or RequestStop()).
+    """
+    return _stop_requested.is_set()
+
+
+def RequestStop():
+    """
+    Ask running jobs to stop after their in-flight items, as the first Ctrl+C does.
+    """
+    _stop_requested.set()
+
+
+def ResetStop():
+    """
+    Clear a previous stop request, e.g. before starting the next job in the same process.
+    """
+    _stop_requested.clear()
+
+
+def _graceful_handler(signum, frame):
+    if not _stop_requested.is_set():
+        _stop_requested.set()
+        print(f"\n[🛑 Interrupted] Finishing the items in progress and saving the journal. "
+              f"Press Ctrl+C again to kill PID {os.getpid()}.", flush=True)
+        return
+    # Second signal: stop waiting
+    from .abdutil import ExitHandler
+    ExitHandler(signum, frame)
+
+
+def EnableGracefulStop(signals=None):
+    """
+    Make Ctrl+C (SIGINT), SIGTERM and Ctrl+Z (SIGTSTP) request a graceful stop instead of killing
+    the process. A second signal falls back to LookForKeys' immediate kill. Must be called from the
+    main thread.
+
+    Args:
+        signals (list): The signals to handle. Defaults to SIGINT, SIGTERM and SIGTSTP (where available).
+    """
+    if signals is None:
+        signals = [getattr(signal, name) for name in ('SIGINT', 'SIGTERM', 'SIGTSTP') if hasattr(signal, name)]
+    for signum in signals:
+        previous = signal.signal(signum, _graceful_handler)
+        _previous_handlers.setdefault(signum, previous)
+
+
+def DisableGracefulStop():
+    """
+    Restore the signal handlers that were active before EnableGracefulStop.
+    """
+    for signum, previous in _previous_handlers.items():
+        signal.signal(signum, previous)
+    _previous_handlers.clear()
+
+
+def RunJob(func=None, items=None, journal=None, workers=1, on_stop=None, shard=None, shard_method='sorted',
+           verbose=True):
+    """
+    Run func(item) over a batch of items with checkpointing and graceful interruption.
+
+    Items already in the journal are skipped, every successful item is recorded in it, and when a
+    stop is requested (Ctrl+C after EnableGracefulStop or LookForKeys(graceful=True), SIGTERM, or
+    RequestStop()) no new items are started: the ones in flight finish, the journal is flushed and
+    'on_stop' is called, so the next run resumes with the remaining items. Items whose function
+    raises are reported and left out of the journal, so they are retried next time.
+
+    Args:
+        func (callable): The function applied to each item.
+        items (iterable): The work items, e.g. paths from ReadDirectoryContents.
+        journal (str or JobJournal): The journal, or its path. Defaults to None (no resume).
+        workers (int): Items processed at the same time, or None for RecommendWorkers('io'). Defaults to 1.
+        on_stop (callable or list): Called after an interrupted run has drained, e.g. to flush or
+                                    close writers. Defaults to None.
+        shard (tuple or str): Only run the share of worker (rank, world_size) of the items, or 'auto'
+                              for the launcher's environment (see ShardItems). Give every worker
+                              its own journal. Defaults to None.
+        shard_method (str): 'sorted', 'hash' or 'size' (even bytes per worker). Defaults to 'sorted'.
+        verbose (bool): Whether to display verbose messages. Defaults to True.
+
+    Returns:
+        dict: 'done', 'skipped', 'failed' (the failed items) and 'stopped' (True if interrupted).
+
+    Example:
+        EnableGracefulStop()
+        summary = RunJob(convert, ReadDirectoryContents('/data/*.png'), journal='convert.journal', workers=4)
+    """
+    check_required_args(optional=('journal', 'workers', 'on_stop', 'shard'))
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        items = list(items)
+        if shard is not None:
+            from .abdparallel import ShardItems
+            rank, world_size = (None, None) if shard == 'auto' else shard
+            items = ShardItems(items, rank, world_size, shard_method)
+        owns_journal = isinstance(journal, str)
+        if owns_journal:
+            journal = JobJournal(journal)
+        pending = journal.Pending(items) if journal is not None else items
+        if workers is None:
+            from .abdparallel import RecommendWorkers
+            workers = RecommendWorkers('io', max_workers=len(pending) or 1)
+        workers = max(1, workers)
+
+        summary = {'done': 0, 'skipped': len(items) - len(pending), 'failed': [], 'stopped': False}
+        if verbose and summary['skipped']:
+            msg = f"Resuming: {summary['skipped']} of {len(items)} items are already done."
+            ShowInfo(msg, caller_filename, caller_line)
+
+        def finished(item, error):
+            if error is None:
+                summary['done'] += 1
+                if journal is not None:
+                    journal.Done(item)
+            else:
+                summary['failed'].append(item)
+                msg = f"Item {item!r} failed: {error}"
+                ShowWarning(msg, caller_filename, caller_line)
+
+        if workers == 1:
+            for item in pending:
+                if StopRequested():
+                    break
+                try:
+                    func(item)
+                    finished(item, None)
+                except Exception as e:
+                    finished(item, e)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                in_flight = {}
+                index = 0
+                while index < len(pending) or in_flight:
+                    while index < len(pending) and len(in_flight) < workers and not StopRequested():
+                        in_flight[executor.submit(func, pending[index])] = pending[index]
+                        index += 1
+                    if not in_flight:
+                        break
+                    # Short timeout so a stop request is noticed while long items run
+                    done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item = in_flight.pop(future)
+                        error = future.exception()
+                        finished(item, error)
+
+        summary['stopped'] = StopRequested() and summary['done'] + len(summary['failed']) < len(pending)
+        if journal is not None:
+            if owns_journal:
+                journal.Close()
+            else:
+                journal.Flush()
+
+        if summary['stopped']:
+            callbacks = on_stop if isinstance(on_stop, (list, tuple)) else [on_stop] if on_stop else []
+            for callback in callbacks:
+                callback()
+            if verbose:
+                remaining = len(pending) - summary['done'] - len(summary['failed'])
+                msg = f"Stopped with {remaining} items left; the journal is saved, run again to resume."
+                ShowInfo(msg, caller_filename, caller_line)
+        elif verbose:
+            msg = f"Finished {summary['done']} items ({len(summary['failed'])} failed, {summary['skipped']} skipped)."
+            ShowInfo(msg, caller_filename, caller_line)
+        return summary
+
+    except Exception as e:
+        msg = f"Error running the job: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
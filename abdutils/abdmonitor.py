@@ -0,0 +1,800 @@
+# https://github.com/abdkhanstd/abdutils
+import atexit
+import csv
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+import warnings
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+
+try:
+    import GPUtil
+except ImportError:
+    GPUtil = None
+
+from .abdutil import HandleError, get_caller_info
+
+
+def _gpu_readings():
+    # One nvidia-smi call; [] when GPUtil, the driver or the GPUs are missing
+    if GPUtil is None:
+        return []
+    try:
+        gpus = GPUtil.getGPUs()
+    except Exception:
+        return []
+    return [{
+        'id': gpu.id,
+        'name': gpu.name,
+        'load_percent': gpu.load * 100,
+        'memory_percent': gpu.memoryUtil * 100,
+        'memory_used_mb': gpu.memoryUsed,
+        'memory_total_mb': gpu.memoryTotal,
+        'temperature': gpu.temperature,
+    } for gpu in gpus]
+
+
+def _rate(current, previous, field, seconds):
+    if current is None or previous is None or seconds <= 0:
+        return 0.0
+    return max(getattr(current, field) - getattr(previous, field), 0) / seconds
+
+
+class SystemSampler(object):
+    """
+    Collects CPU, memory, disk and network usage (and optionally GPU usage) on a background
+    thread and keeps the last 'history' samples in a ring buffer, so reading the current usage
+    never blocks.
+
+    Each sample is a dict with the keys 'time', 'cpu_percent', 'cpu_per_core', 'memory_percent',
+    'memory_used', 'memory_available', 'disk_percent', 'disk_read_bytes_per_sec',
+    'disk_write_bytes_per_sec', 'net_sent_bytes_per_sec', 'net_recv_bytes_per_sec' and 'gpus'
+    (a list of dicts, empty when no GPU is found). The rates are None in the first sample, which
+    has no earlier counters to compare with.
+
+    Callbacks receive every new sample on the sampler thread, which is where the exporters
+    (PrometheusExporter, TimeSeriesWriter) do their work.
+
+    Example:
+        with SystemSampler(interval=0.5) as sampler:
+            train()
+            print(sampler.Latest()['cpu_percent'])
+            peak = max(sample['memory_percent'] for sample in sampler.History())
+    """
+
+    def __init__(self, interval=1.0, history=300, gpu=True, gpu_interval=5.0, disk_path='/', callbacks=None):
+        """
+        Args:
+            interval (float): Seconds between samples. Defaults to 1.0.
+            history (int): Number of samples kept in the ring buffer. Defaults to 300.
+            gpu (bool): Probe GPUs with GPUtil. Defaults to True; ignored without GPUtil.
+            gpu_interval (float): Seconds between GPU probes, each of which runs nvidia-smi.
+                                  Samples in between repeat the last reading, and a failed
+                                  probe is retried after the same interval. Defaults to 5.0.
+            disk_path (str): Mount point used for 'disk_percent'. Defaults to '/'.
+            callbacks (list): Functions called with each sample. Defaults to none.
+        """
+        self.interval = interval
+        self.history = history
+        self.gpu = gpu and GPUtil is not None
+        self.gpu_interval = gpu_interval
+        self.disk_path = disk_path
+        self._samples = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._previous = None
+        self._gpus = []
+        self._gpu_checked = 0.0
+        self._pid = os.getpid()
+        self.callbacks = list(callbacks or [])
+        self._failed = set()
+
+    def Start(self):
+        """
+        Start the sampling thread (once) and take a first sample right away.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='abdutils-sampler', daemon=True)
+        # psutil measures CPU since its previous call (or its import), so this sample is not empty
+        self.Sample()
+        self._thread.start()
+        return self
+
+    def Stop(self, timeout=None):
+        """
+        Stop the sampling thread. The collected history is kept.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout if timeout is not None else self.interval + 1.0)
+        self._thread = None
+
+    def AddCallback(self, callback):
+        """
+        Call 'callback(sample)' for every new sample. Returns the callback.
+        """
+        self.callbacks.append(callback)
+        return callback
+
+    def RemoveCallback(self, callback):
+        if callback in self.callbacks:
+            self.callbacks.remove(callback)
+
+    def _notify(self, sample):
+        for callback in list(self.callbacks):
+            try:
+                callback(sample)
+            except Exception as e:
+                # Keep sampling and keep calling the other exporters; warn once per callback
+                if id(callback) not in self._failed:
+                    self._failed.add(id(callback))
+                    warnings.warn(f"SystemSampler callback {callback!r} failed: {e}")
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.Sample()
+            except Exception:
+                # A failing probe must not kill the thread; the next tick tries again
+                continue
+
+    def _io_counters(self):
+        try:
+            disk = psutil.disk_io_counters()
+        except Exception:
+            disk = None
+        try:
+            net = psutil.net_io_counters()
+        except Exception:
+            net = None
+        return disk, net
+
+    def _probe_gpus(self, now):
+        if not self.gpu or now - self._gpu_checked < self.gpu_interval:
+            return self._gpus
+        # A failed probe (driver busy or restarting) gives [] until the next try
+        self._gpu_checked = now
+        self._gpus = _gpu_readings()
+        return self._gpus
+
+    def Sample(self):
+        """
+        Take one sample now, add it to the history and return it. Called by the thread;
+        only needed directly when sampling by hand without Start().
+        """
+        now = time.time()
+        per_core = psutil.cpu_percent(percpu=True)
+        memory = psutil.virtual_memory()
+        try:
+            disk_percent = psutil.disk_usage(self.disk_path).percent
+        except OSError:
+            disk_percent = None
+        disk, net = self._io_counters()
+        # The first sample has no interval to compute rates over
+        first = self._previous is None
+        then, (previous_disk, previous_net) = self._previous or (now, (None, None))
+        seconds = now - then
+        self._previous = (now, (disk, net))
+
+        sample = {
+            'time': now,
+            'cpu_percent': sum(per_core) / len(per_core) if per_core else 0.0,
+            'cpu_per_core': per_core,
+            'memory_percent': memory.percent,
+            'memory_used': memory.used,
+            'memory_available': memory.available,
+            'disk_percent': disk_percent,
+            'disk_read_bytes_per_sec': None if first else _rate(disk, previous_disk, 'read_bytes', seconds),
+            'disk_write_bytes_per_sec': None if first else _rate(disk, previous_disk, 'write_bytes', seconds),
+            'net_sent_bytes_per_sec': None if first else _rate(net, previous_net, 'bytes_sent', seconds),
+            'net_recv_bytes_per_sec': None if first else _rate(net, previous_net, 'bytes_recv', seconds),
+            'gpus': self._probe_gpus(now),
+        }
+        with self._lock:
+            self._samples.append(sample)
+        self._notify(sample)
+        return sample
+
+    def Latest(self):
+        """
+        Returns:
+            dict: The most recent sample, or None before the first one.
+        """
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def History(self, seconds=None):
+        """
+        Args:
+            seconds (float): Only return samples from the last 'seconds'. Defaults to all.
+
+        Returns:
+            list: Samples in the ring buffer, oldest first.
+        """
+        with self._lock:
+            samples = list(self._samples)
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            samples = [sample for sample in samples if sample['time'] >= cutoff]
+        return samples
+
+    def __enter__(self):
+        return self.Start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Stop()
+        return False
+
+    def __repr__(self):
+        state = 'running' if self.running else 'stopped'
+        return (f"SystemSampler(interval={self.interval}, samples={len(self._samples)}/{self.history}, "
+                f"gpu={self.gpu}, {state})")
+
+
+# (sample key, metric name, help) of the scalar gauges exported to Prometheus
+PROMETHEUS_GAUGES = [
+    ('time', 'sample_timestamp_seconds', "Unix time of the sample."),
+    ('cpu_percent', 'cpu_percent', "CPU usage averaged over all cores."),
+    ('memory_percent', 'memory_percent', "Used memory in percent."),
+    ('memory_used', 'memory_used_bytes', "Used memory."),
+    ('memory_available', 'memory_available_bytes', "Available memory."),
+    ('disk_percent', 'disk_percent', "Disk usage of the sampled mount point."),
+    ('disk_read_bytes_per_sec', 'disk_read_bytes_per_second', "Disk read rate."),
+    ('disk_write_bytes_per_sec', 'disk_write_bytes_per_second', "Disk write rate."),
+    ('net_sent_bytes_per_sec', 'network_sent_bytes_per_second', "Network send rate."),
+    ('net_recv_bytes_per_sec', 'network_received_bytes_per_second', "Network receive rate."),
+]
+
+# (GPU reading key, metric name, help)
+PROMETHEUS_GPU_GAUGES = [
+    ('load_percent', 'gpu_load_percent', "GPU load."),
+    ('memory_percent', 'gpu_memory_percent', "Used GPU memory in percent."),
+    ('memory_used_mb', 'gpu_memory_used_megabytes', "Used GPU memory."),
+    ('temperature', 'gpu_temperature_celsius', "GPU temperature."),
+]
+
+
+def _label_string(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+def FormatPrometheus(sample, prefix='abdutils_', labels=None):
+    """
+    Render a sample in the Prometheus text exposition format (all metrics are gauges).
+
+    Args:
+        sample (dict): A SystemSampler sample.
+        prefix (str): Prefix of the metric names. Defaults to 'abdutils_'.
+        labels (dict): Labels added to every metric, e.g. {'job': 'train'}. Defaults to none.
+
+    Returns:
+        str: The exposition text.
+    """
+    labels = dict(labels or {})
+    lines = []
+
+    def gauge(name, help_text, values):
+        lines.append(f"# HELP {prefix}{name} {help_text}")
+        lines.append(f"# TYPE {prefix}{name} gauge")
+        for extra, value in values:
+            lines.append(f"{prefix}{name}{_label_string({**labels, **extra})} {float(value)!r}")
+
+    for key, name, help_text in PROMETHEUS_GAUGES:
+        if sample.get(key) is not None:
+            gauge(name, help_text, [({}, sample[key])])
+    if sample.get('cpu_per_core'):
+        gauge('cpu_core_percent', "CPU usage per core.",
+              [({'core': str(core)}, value) for core, value in enumerate(sample['cpu_per_core'])])
+    gpus = sample.get('gpus') or []
+    for key, name, help_text in PROMETHEUS_GPU_GAUGES:
+        values = [({'gpu': str(gpu['id']), 'name': gpu['name']}, gpu[key]) for gpu in gpus if gpu.get(key) is not None]
+        if values:
+            gauge(name, help_text, values)
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.exporter.text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PrometheusExporter(object):
+    """
+    A SystemSampler callback that publishes the latest sample in the Prometheus text format,
+    to a file (for node_exporter's textfile collector) and/or over HTTP on /metrics.
+
+    The text is rendered once per sample on the sampler thread; HTTP requests only send
+    the cached bytes.
+
+    Example:
+        exporter = PrometheusExporter(port=9101, labels={'job': 'train'})
+        sampler = SystemSampler(callbacks=[exporter]).Start()
+    """
+
+    def __init__(self, path=None, port=None, host='127.0.0.1', prefix='abdutils_', labels=None):
+        """
+        Args:
+            path (str): File rewritten (atomically) with every sample. Defaults to none.
+            port (int): Serve http://host:port/metrics; 0 picks a free port. Defaults to none.
+            host (str): Address the HTTP server binds to. Defaults to '127.0.0.1'.
+            prefix (str): Prefix of the metric names. Defaults to 'abdutils_'.
+            labels (dict): Labels added to every metric. Defaults to none.
+        """
+        if path is None and port is None:
+            raise ValueError("Please give a 'path', a 'port', or both.")
+        self.path = path
+        self.prefix = prefix
+        self.labels = dict(labels or {})
+        self.text = ''
+        self._server = None
+        if port is not None:
+            self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            self._server.daemon_threads = True
+            self._server.exporter = self
+            threading.Thread(target=self._server.serve_forever, name='abdutils-metrics', daemon=True).start()
+
+    @property
+    def port(self):
+        return self._server.server_address[1] if self._server is not None else None
+
+    def __call__(self, sample):
+        self.text = FormatPrometheus(sample, self.prefix, self.labels)
+        if self.path is not None:
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary, 'w') as handle:
+                handle.write(self.text)
+            os.replace(temporary, self.path)
+
+    def Close(self):
+        """
+        Shut the HTTP server down.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+        return False
+
+
+def _flatten(sample):
+    # One scalar column per value, for CSV
+    row = {key: value for key, value in sample.items() if key not in ('cpu_per_core', 'gpus')}
+    for core, value in enumerate(sample.get('cpu_per_core') or []):
+        row[f'cpu_core_{core}_percent'] = value
+    for gpu in sample.get('gpus') or []:
+        for key, value in gpu.items():
+            if key not in ('id', 'name'):
+                row[f"gpu_{gpu['id']}_{key}"] = value
+    return row
+
+
+class TimeSeriesWriter(object):
+    """
+    A SystemSampler callback that appends every sample to a CSV or JSON-lines file, rolling
+    over to path.1, path.2, ... when the file grows past 'max_bytes'.
+
+    CSV columns are fixed by the first sample of each file: per-core CPU and per-GPU values
+    become their own columns. JSON lines keep the sample dicts as they are.
+
+    Example:
+        with TimeSeriesWriter('usage.csv') as writer:
+            with SystemSampler(interval=5, callbacks=[writer]):
+                train()
+    """
+
+    def __init__(self, path=None, format=None, max_bytes=10 * 2**20, backups=3):
+        """
+        Args:
+            path (str): Output file.
+            format (str): 'csv' or 'jsonl'. Defaults to the file extension ('.csv' is CSV,
+                          anything else JSON lines).
+            max_bytes (int): Size at which the file is rolled over. None never rolls.
+                             Defaults to 10 MB.
+            backups (int): Rolled-over files kept. Defaults to 3.
+        """
+        if path is None:
+            raise ValueError("Please give the output 'path'.")
+        if format is None:
+            format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+        if format not in ('csv', 'jsonl'):
+            raise ValueError(f"Unsupported format: {format}. Please use 'csv' or 'jsonl'.")
+        self.path = path
+        self.format = format
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handle = None
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def _open(self, row):
+        self._handle = open(self.path, 'a', newline='')
+        if self.format == 'csv':
+            self._writer = csv.DictWriter(self._handle, fieldnames=list(row), restval='', extrasaction='ignore')
+            if self._handle.tell() == 0:
+                self._writer.writeheader()
+            else:
+                # Appending to an existing file: keep its columns
+                with open(self.path, newline='') as existing:
+                    self._writer.fieldnames = next(csv.reader(existing), list(row))
+
+    def _roll(self):
+        self.Close()
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def __call__(self, sample):
+        row = _flatten(sample) if self.format == 'csv' else sample
+        with self._lock:
+            if self._handle is None:
+                self._open(row)
+            if self.format == 'csv':
+                self._writer.writerow(row)
+            else:
+                self._handle.write(json.dumps(row) + '\n')
+            self._handle.flush()
+            if self.max_bytes is not None and self._handle.tell() >= self.max_bytes:
+                self._roll()
+
+    def Close(self):
+        """
+        Close the file. The next sample reopens it in append mode.
+        """
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._lock:
+            self.Close()
+        return False
+
+
+_default_sampler = None
+_default_lock = threading.Lock()
+
+
+def GetSampler():
+    """
+    The process-wide sampler used by GetSystemUsage and ShowUsage, started on first use.
+    Its samples are lost in forked children, which start their own sampler when asked.
+    """
+    global _default_sampler
+    with _default_lock:
+        if _default_sampler is None or _default_sampler._pid != os.getpid():
+            _default_sampler = SystemSampler().Start()
+        return _default_sampler
+
+
+def GetSystemUsage(full=False):
+    """
+    Returns the latest CPU, GPU and disk usage from the background sampler, without waiting.
+
+    Args:
+        full (bool): Return the whole sample dict (per-core CPU, memory, disk and network
+                     rates, GPUs) instead of the (cpu, gpu_usages, gpu_memory, disk) tuple.
+                     Defaults to False.
+
+    Returns:
+        tuple or dict: (cpu, gpu_usages, gpu_memory, disk), where the GPU lists are ['N/A']
+                       without GPUs, or the sample dict when full=True.
+    """
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        sample = GetSampler().Latest()
+        if full:
+            return sample
+        gpus = sample['gpus']
+        gpu_usages = [gpu['load_percent'] for gpu in gpus] if gpus else ['N/A']
+        gpu_memory = [gpu['memory_percent'] for gpu in gpus] if gpus else ['N/A']
+        return sample['cpu_percent'], gpu_usages, gpu_memory, sample['disk_percent']
+
+    except Exception as e:
+        msg = f"Error reading the system usage: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
+
+
+# Application counters shown on the status line. Names ending in '_bytes' are shown as MB/s.
+_counters = {}
+_gauges = {}
+_counters_lock = threading.Lock()
+
+
+def IncrementCounter(name, amount=1):
+    """
+    Add 'amount' to a throughput counter, e.g. IncrementCounter('items') per processed image
+    or IncrementCounter('read_bytes', len(data)). The status line shows counters as rates.
+    """
+    with _counters_lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def SetCounter(name, value):
+    """
+    Set a level counter, such as a queue depth. The status line shows its current value.
+    """
+    with _counters_lock:
+        _gauges[name] = value
+
+
+def GetCounters():
+    """
+    Returns:
+        dict: 'totals' (the throughput counters since start) and 'levels' (the SetCounter values).
+    """
+    with _counters_lock:
+        return {'totals': dict(_counters), 'levels': dict(_gauges)}
+
+
+def _format_rate(name, per_second):
+    if name.endswith('_bytes'):
+        return f"{name[:-len('_bytes')]} {per_second / 2**20:.1f} MB/s"
+    return f"{name} {per_second:.1f}/s"
+
+
+class _PartialLine(str):
+    # Flushed text without its newline yet (a prompt): printed as is, and the status line is not
+    # redrawn over it until the next complete line
+    pass
+
+
+class _QueuedStdout(object):
+    # Stands in for sys.stdout while a StatusLine draws on it, so print() output (ShowInfo,
+    # ShowWarning, HandleError, verbose messages, user prints) is written by the renderer thread
+    # instead of over the status line. Partial lines are kept per thread until their newline or
+    # a flush(), so print(end='', flush=True) and input() prompts still show up.
+
+    def __init__(self, status_line, stream):
+        self._status_line = status_line
+        self._stream = stream
+        self._partial = {}
+
+    def write(self, text):
+        thread = threading.get_ident()
+        lines = (self._partial.pop(thread, '') + text).split('\n')
+        if lines[-1]:
+            self._partial[thread] = lines[-1]
+        for line in lines[:-1]:
+            self._status_line.Message(line)
+        return len(text)
+
+    def flush(self):
+        partial = self._partial.pop(threading.get_ident(), '')
+        if partial:
+            self._status_line._messages.put(_PartialLine(partial))
+
+    def drain(self):
+        for thread in list(self._partial):
+            self._status_line.Message(self._partial.pop(thread))
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class StatusLine(object):
+    """
+    A renderer thread that owns the terminal: it keeps one status line (system usage and
+    application counters) at the bottom of the output and prints queued messages above it,
+    so no two threads write escape codes at the same time.
+
+    The status line is redrawn at most once per 'interval'; messages are printed as soon as
+    the thread picks them up. When the stream is not a terminal, only the messages are printed.
+    While a status line writes to sys.stdout, sys.stdout is replaced by a stand-in that queues
+    everything printed (including abdutils' own messages), and pending messages are still
+    printed when the program exits.
+
+    Example:
+        status = StatusLine().Start()
+        for path in paths:
+            data = process(path)
+            IncrementCounter('items')
+            IncrementCounter('written_bytes', len(data))
+            status.Message(f"Done {path}")
+        status.Stop()
+    """
+
+    def __init__(self, interval=1.0, usage=True, stream=None):
+        """
+        Args:
+            interval (float): Seconds between redraws of the status line. Defaults to 1.0.
+            usage (bool): Show CPU, GPU and disk usage from the process-wide sampler. Defaults to True.
+            stream (file): Where to write. Defaults to sys.stdout.
+        """
+        self.interval = interval
+        self.usage = usage
+        self.stream = stream
+        self.text = ''
+        self._messages = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._previous = None
+        self._stream = None
+        self._stdout = None
+        self._exit_registered = False
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def Start(self):
+        """
+        Start the renderer thread (once).
+        """
+        if not self.running:
+            self._stop.clear()
+            self._previous = (time.time(), GetCounters()['totals'])
+            self._stream = self.stream or sys.stdout
+            if self._stream is sys.stdout:
+                self._stdout = sys.stdout = _QueuedStdout(self, self._stream)
+            if not self._exit_registered:
+                # exit() right after a message (HandleError) must not lose it
+                atexit.register(self.Stop)
+                self._exit_registered = True
+            self._thread = threading.Thread(target=self._run, name='abdutils-status', daemon=True)
+            self._thread.start()
+        return self
+
+    def Stop(self, timeout=None):
+        """
+        Print the pending messages, clear the status line and stop the thread.
+        """
+        if self._stdout is not None:
+            if sys.stdout is self._stdout:
+                sys.stdout = self._stream
+            self._stdout.drain()
+            self._stdout = None
+        self._stop.set()
+        self._messages.put(None)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout if timeout is not None else self.interval + 1.0)
+        self._thread = None
+
+    def Message(self, message):
+        """
+        Print 'message' above the status line (from any thread).
+        """
+        self._messages.put(str(message))
+
+    def _usage_text(self):
+        sample = GetSampler().Latest()
+        parts = [f"CPU: {sample['cpu_percent']:.1f}%"]
+        for gpu in sample['gpus']:
+            parts.append(f"GPU {gpu['id']}: {gpu['load_percent']:.0f}% mem {gpu['memory_percent']:.0f}%")
+        if sample['disk_percent'] is not None:
+            parts.append(f"Disk: {sample['disk_percent']}%")
+        return parts
+
+    def Render(self):
+        """
+        Returns:
+            str: The status line for the counters since the previous call.
+        """
+        now = time.time()
+        counters = GetCounters()
+        then, previous = self._previous or (now, {})
+        seconds = max(now - then, 1e-9)
+        self._previous = (now, counters['totals'])
+        parts = self._usage_text() if self.usage else []
+        for name, total in counters['totals'].items():
+            parts.append(_format_rate(name, (total - previous.get(name, 0)) / seconds))
+        for name, value in counters['levels'].items():
+            parts.append(f"{name} {value}")
+        return ' | '.join(parts)
+
+    def _run(self):
+        stream = self._stream
+        tty = stream.isatty() if hasattr(stream, 'isatty') else False
+        next_draw = 0.0
+        prompt = False
+        while True:
+            # Without a terminal (or under a prompt) there is nothing to redraw: just wait for messages
+            timeout = max(next_draw - time.time(), 0.0) if tty and not prompt else None
+            try:
+                messages = [self._messages.get(timeout=timeout)]
+            except queue.Empty:
+                messages = []
+            while True:
+                try:
+                    messages.append(self._messages.get_nowait())
+                except queue.Empty:
+                    break
+            messages = [message for message in messages if message is not None]
+            stopping = self._stop.is_set()
+
+            output = []
+            for message in messages:
+                # Overwrite the status line with the messages, then draw it again below them;
+                # text after a prompt continues its line, as it would on a plain stream
+                if tty and not prompt:
+                    output.append('\r\033[K')
+                prompt = isinstance(message, _PartialLine)
+                output.append(message if prompt else message + '\n')
+            if tty and not stopping and not prompt:
+                if time.time() >= next_draw:
+                    try:
+                        self.text = self.Render()
+                    except Exception as e:
+                        self.text = f"Status unavailable: {e}"
+                    next_draw = time.time() + self.interval
+                    output.append('\r\033[K' + self.text[:shutil.get_terminal_size((80, 20)).columns - 1])
+                elif messages:
+                    output.append(self.text[:shutil.get_terminal_size((80, 20)).columns - 1])
+            if stopping and tty and not prompt:
+                output.append('\r\033[K')
+            if output:
+                try:
+                    stream.write(''.join(output))
+                    stream.flush()
+                except (OSError, ValueError):
+                    # Closed stream or broken pipe: nothing left to draw on
+                    return
+            if stopping:
+                return
+
+    def __enter__(self):
+        return self.Start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Stop()
+        return False
+
+
+_status_line = None
+
+
+def GetStatusLine():
+    """
+    The process-wide StatusLine used by ShowUsage and add_message (not started here).
+    """
+    global _status_line
+    with _default_lock:
+        if _status_line is None:
+            _status_line = StatusLine()
+        return _status_line
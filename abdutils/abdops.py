@@ -0,0 +1,188 @@
+# https://github.com/abdkhanstd/abdutils
+import cv2
+import numpy as np
+from PIL import ImageFilter, Image, ImageEnhance
+
+from .abdutil import HandleError, get_caller_info, _detect_edges_array, _gaussian_blur_array, AsArray
+
+
+# Kernel used by PIL's ImageEnhance.Sharpness (ImageFilter.SMOOTH)
+SMOOTH_KERNEL = np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) / 13.0
+
+CV2_INTERPOLATION_MAP = {
+    'CV_NEAREST': cv2.INTER_NEAREST,
+    'CV_LINEAR': cv2.INTER_LINEAR,
+    'CV_CUBIC': cv2.INTER_CUBIC,
+    'CV_LANCZOS4': cv2.INTER_LANCZOS4,
+    'CV_AREA': cv2.INTER_AREA,
+}
+
+
+def _to_array(image):
+    # Canonical representation: uint8 ndarray, (H, W) for grayscale or (H, W, 3) for RGB
+    if isinstance(image, Image.Image):
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('RGB')
+        return AsArray(image)
+    if isinstance(image, np.ndarray):
+        if image.ndim == 3 and image.shape[2] == 1:
+            return image[..., 0]
+        return image
+    raise TypeError("Unsupported image type. Please provide a PIL Image or numpy array (cv2 image).")
+
+
+def _pil_op(array, func):
+    # Run a PIL implementation on the canonical array and come straight back
+    return np.asarray(func(Image.fromarray(array)))
+
+
+def _op_rgb(array, backend):
+    if array.ndim == 2:
+        return cv2.cvtColor(array, cv2.COLOR_GRAY2RGB)
+    if array.shape[2] == 4:
+        return cv2.cvtColor(array, cv2.COLOR_RGBA2RGB)
+    return array
+
+
+def _op_grayscale(array, backend):
+    if array.ndim == 2:
+        return array
+    if backend == 'PIL':
+        return _pil_op(array, lambda img: img.convert('L'))
+    return cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+
+
+def _op_crop(array, backend, coordinates):
+    left, top, right, bottom = coordinates
+    # Slicing is a view, no pixels are copied
+    return array[top:bottom, left:right]
+
+
+def _op_resize(array, backend, size, interpolation):
+    if backend == 'PIL':
+        return _pil_op(array, lambda img: img.resize(size, Image.BILINEAR))
+    interpolation = CV2_INTERPOLATION_MAP.get(interpolation, interpolation)
+    return cv2.resize(array, size, interpolation=interpolation)
+
+
+def _op_gaussian_blur(array, backend, sigma):
+    if backend == 'PIL':
+        return _pil_op(array, lambda img: img.filter(ImageFilter.GaussianBlur(sigma)))
+    # PIL's GaussianBlur radius is the standard deviation, so sigma maps across directly
+    return _gaussian_blur_array(array, sigma)
+
+
+def _op_sharpen(array, backend, factor):
+    if backend == 'PIL':
+        return _pil_op(array, lambda img: ImageEnhance.Sharpness(img).enhance(factor))
+    # Same blend as ImageEnhance.Sharpness: smooth + factor * (image - smooth), saturated
+    smoothed = cv2.filter2D(array, -1, SMOOTH_KERNEL, borderType=cv2.BORDER_REPLICATE)
+    # PIL leaves the one-pixel border unfiltered
+    smoothed[0], smoothed[-1] = array[0], array[-1]
+    smoothed[:, 0], smoothed[:, -1] = array[:, 0], array[:, -1]
+    return cv2.addWeighted(array, factor, smoothed, 1.0 - factor, 0)
+
+
+def _op_detect_edges(array, backend, method, threshold1, threshold2):
+    return _detect_edges_array(array, method, threshold1, threshold2)
+
+
+def _op_filter(array, backend, kernel):
+    return cv2.filter2D(array, -1, kernel)
+
+
+class ImageOps(object):
+    """
+    A composable chain of image operations that keeps a single NumPy array
+    throughout and only converts to/from PIL at the boundaries.
+
+    Each step picks its implementation from the backend ('auto' and 'CV2' use
+    OpenCV, 'PIL' uses Pillow for the ops that have a Pillow counterpart).
+
+    Example:
+        ops = ImageOps().ConvertToRGB().GaussianBlur(2.0).Sharpen(2.0).DetectEdges('sobel')
+        edges = ops(image)  # Same type as the input (PIL in, PIL out)
+    """
+
+    def __init__(self, backend='auto'):
+        if backend not in ('auto', 'PIL', 'CV2'):
+            raise ValueError(f"Unsupported backend: {backend}. Please use 'auto', 'PIL', or 'CV2'.")
+        self.backend = backend
+        self.steps = []
+
+    def _add(self, func, backend=None, **params):
+        self.steps.append((func, backend or self.backend, params))
+        return self
+
+    def ConvertToRGB(self):
+        return self._add(_op_rgb)
+
+    def ConvertToGrayscale(self, backend=None):
+        return self._add(_op_grayscale, backend)
+
+    def Crop(self, coordinates):
+        if len(coordinates) != 4:
+            raise ValueError("Coordinates list should contain exactly 4 values.")
+        return self._add(_op_crop, coordinates=tuple(coordinates))
+
+    def Resize(self, size, interpolation='CV_LINEAR', backend=None):
+        return self._add(_op_resize, backend, size=tuple(size), interpolation=interpolation)
+
+    def GaussianBlur(self, sigma=1.0, backend=None):
+        if not isinstance(sigma, (int, float)) or sigma <= 0:
+            raise ValueError("Input 'sigma' must be a positive number.")
+        return self._add(_op_gaussian_blur, backend, sigma=sigma)
+
+    def Sharpen(self, factor=2.0, backend=None):
+        if not isinstance(factor, (int, float)) or factor <= 0:
+            raise ValueError("Input 'factor' must be a positive number.")
+        return self._add(_op_sharpen, backend, factor=factor)
+
+    def DetectEdges(self, method='canny', threshold1=100, threshold2=200):
+        return self._add(_op_detect_edges, method=method, threshold1=threshold1, threshold2=threshold2)
+
+    def ApplyFilter(self, kernel):
+        return self._add(_op_filter, kernel=np.asarray(kernel, dtype=np.float32))
+
+    def Run(self, image=None, output='auto'):
+        """
+        Run the chain on an image.
+
+        Args:
+            image (PIL.Image.Image or numpy.ndarray): The input image.
+            output (str): The output type ('auto' returns the input type, 'PIL' or 'CV2').
+
+        Returns:
+            PIL.Image.Image or numpy.ndarray: The processed image.
+        """
+        caller_filename, caller_line = get_caller_info()
+
+        try:
+            if output == 'auto':
+                output = 'PIL' if isinstance(image, Image.Image) else 'CV2'
+
+            array = _to_array(image)
+            for func, backend, params in self.steps:
+                array = func(array, backend, **params)
+
+            if output == 'PIL':
+                return Image.fromarray(np.ascontiguousarray(array))
+            if output == 'CV2':
+                return array
+
+            msg = f"Unsupported output: {output}. Please use 'auto', 'PIL', or 'CV2'."
+            HandleError(msg, caller_filename, caller_line)
+
+        except Exception as e:
+            msg = f"Error running the image operations: {str(e)}"
+            HandleError(msg, caller_filename, caller_line)
+            return None
+
+    __call__ = Run
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        names = ', '.join(func.__name__[4:] for func, _, _ in self.steps)
+        return f"ImageOps([{names}], backend='{self.backend}')"
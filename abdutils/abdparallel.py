@@ -0,0 +1,475 @@
+# https://github.com/abdkhanstd/abdutils
+import hashlib
+import heapq
+import json
+import math
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+import cv2
+import psutil
+
+from .abdutil import HandleError, ShowInfo, check_required_args, get_caller_info
+
+
+# cgroup v2 and v1 control files, relative to the cgroup mount
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+
+def _read(path):
+    try:
+        with open(path) as handle:
+            return handle.read().strip()
+    except (OSError, ValueError):
+        return None
+
+
+def _cgroup_paths(controller, name):
+    # The process' own cgroup first (hosts with a full hierarchy), then the mount root (containers)
+    relative = ''
+    content = _read('/proc/self/cgroup') or ''
+    for line in content.splitlines():
+        parts = line.split(':', 2)
+        if len(parts) == 3 and (parts[1] == '' or controller in parts[1].split(',')):
+            relative = parts[2].lstrip('/')
+            break
+    candidates = [os.path.join(CGROUP_ROOT, relative, name), os.path.join(CGROUP_ROOT, name),
+                  os.path.join(CGROUP_ROOT, controller, relative, name), os.path.join(CGROUP_ROOT, controller, name)]
+    return list(dict.fromkeys(candidates))
+
+
+def _cgroup_cpu_limit():
+    # v2: 'cpu.max' holds '<quota> <period>' or 'max <period>'
+    for path in _cgroup_paths('cpu', 'cpu.max'):
+        value = _read(path)
+        if value:
+            quota, _, period = value.partition(' ')
+            if quota != 'max' and period:
+                return int(quota) / int(period)
+            return None
+    # v1: cpu.cfs_quota_us is -1 without a limit
+    for path in _cgroup_paths('cpu', 'cpu.cfs_quota_us'):
+        quota = _read(path)
+        period = _read(path.replace('cpu.cfs_quota_us', 'cpu.cfs_period_us'))
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    return None
+
+
+def _cgroup_memory_available():
+    for limit_name, usage_name in (('memory.max', 'memory.current'),
+                                   ('memory.limit_in_bytes', 'memory.usage_in_bytes')):
+        for path in _cgroup_paths('memory', limit_name):
+            limit = _read(path)
+            if limit is None:
+                continue
+            # v1 reports "no limit" as a huge number
+            if limit == 'max' or int(limit) >= 2**60:
+                return None
+            usage = _read(path.replace(limit_name, usage_name)) or 0
+            return max(int(limit) - int(usage), 0)
+    return None
+
+
+def AvailableCPUs():
+    """
+    Returns the number of CPUs this process may actually use: the smallest of the CPU count,
+    the CPU affinity mask and the cgroup CPU quota (docker --cpus, Kubernetes limits, Slurm).
+
+    Returns:
+        float: Usable CPUs; a fraction when the cgroup quota is fractional.
+    """
+    cpus = float(os.cpu_count() or 1)
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = min(cpus, len(os.sched_getaffinity(0)))
+    quota = _cgroup_cpu_limit()
+    if quota is not None:
+        cpus = min(cpus, quota)
+    return cpus
+
+
+def AvailableMemory():
+    """
+    Returns the memory in bytes this process can still allocate: the system's available memory,
+    or what is left below the cgroup memory limit when that is lower.
+    """
+    available = psutil.virtual_memory().available
+    limit = _cgroup_memory_available()
+    return min(available, limit) if limit is not None else available
+
+
+def RecommendWorkers(kind='cpu', memory_per_worker=None, max_workers=None, verbose=False):
+    """
+    Pick a worker count for a thread or process pool from the CPUs and memory actually available,
+    the way SelectGPU picks a GPU.
+
+    'cpu' pools get one worker per usable CPU, minus the CPUs kept busy by other processes
+    (1-minute load average). 'io' pools (file copies, image reading and writing) get
+    min(32, CPUs + 4) workers, like ThreadPoolExecutor. Both are then capped so that
+    'memory_per_worker' fits into the available memory.
+
+    Args:
+        kind (str): 'cpu' or 'io'. Defaults to 'cpu'.
+        memory_per_worker (int): Bytes each worker needs (e.g. two decoded images). Defaults to None.
+        max_workers (int): Upper bound, e.g. the number of tasks. Defaults to None.
+        verbose (bool): Whether to display verbose messages. Defaults to False.
+
+    Returns:
+        int: The recommended number of workers (at least 1).
+    """
+    check_required_args(optional=('memory_per_worker', 'max_workers'))
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        cpus = AvailableCPUs()
+        if kind == 'cpu':
+            # Load beyond the calling process itself; a fractional quota still gets one worker
+            busy = max(psutil.getloadavg()[0] - 1.0, 0.0) if hasattr(psutil, 'getloadavg') else 0.0
+            idle = min(cpus, (os.cpu_count() or 1) - busy)
+            workers = max(1, int(math.floor(idle + 0.5)))
+            reason = f"{cpus:g} usable CPU(s), load {busy:.1f} from other processes"
+        elif kind == 'io':
+            workers = min(32, int(math.ceil(cpus)) + 4)
+            reason = f"{cpus:g} usable CPU(s), I/O bound"
+        else:
+            msg = f"Unsupported kind: {kind}. Please use 'cpu' or 'io'."
+            HandleError(msg, caller_filename, caller_line)
+
+        if memory_per_worker:
+            fit = int(AvailableMemory() * 0.8 // memory_per_worker)
+            if fit < workers:
+                workers = max(1, fit)
+                reason += f", memory for {fit} worker(s)"
+        if max_workers is not None:
+            workers = max(1, min(workers, max_workers))
+
+        if verbose:
+            msg = f"Using {workers} worker(s): {reason}."
+            ShowInfo(msg, caller_filename, caller_line)
+        return workers
+
+    except Exception as e:
+        msg = f"Error choosing the number of workers: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return 1
+
+
+_opencv_lock = threading.Lock()
+
+
+@contextmanager
+def OpenCVThreads(workers):
+    """
+    Share the CPUs between 'workers' pool workers and OpenCV's own threads inside the block
+    (cv2.setNumThreads(CPUs // workers)), so that N workers each running a multi-threaded
+    cv2 call do not oversubscribe the cores. The previous setting is restored afterwards.
+
+    cv2.setNumThreads is process-wide, so nested or concurrent blocks share one setting.
+
+    Example:
+        with OpenCVThreads(workers):
+            with ThreadPoolExecutor(workers) as executor:
+                results = list(executor.map(process, images))
+    """
+    threads = max(1, int(AvailableCPUs() // max(workers, 1)))
+    with _opencv_lock:
+        previous = cv2.getNumThreads()
+        cv2.setNumThreads(threads)
+    try:
+        yield threads
+    finally:
+        with _opencv_lock:
+            cv2.setNumThreads(previous)
+
+
+class _Tuner(object):
+    # Hill climbing on the completion rate: keep moving in a direction while throughput
+    # improves by more than 'tolerance', turn around when it drops, hold on a plateau.
+
+    def __init__(self, workers, min_workers, max_workers, window, tolerance=0.05):
+        self.workers = workers
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.window = window
+        self.tolerance = tolerance
+        self.direction = 1
+        self.last_rate = None
+        self.history = []
+        self._completed = 0
+        self._started = time.perf_counter()
+
+    def completed(self):
+        # Returns True when the worker count changed
+        self._completed += 1
+        elapsed = time.perf_counter() - self._started
+        if elapsed < self.window:
+            return False
+        rate = self._completed / elapsed
+        self.history.append((self.workers, rate))
+        self._completed, self._started = 0, time.perf_counter()
+
+        if self.last_rate is not None:
+            if rate < self.last_rate * (1 - self.tolerance):
+                self.direction = -self.direction
+            elif rate < self.last_rate * (1 + self.tolerance):
+                self.last_rate = rate
+                return False
+        self.last_rate = rate
+        workers = min(max(self.workers + self.direction, self.min_workers), self.max_workers)
+        if workers == self.workers:
+            self.direction = -self.direction
+            return False
+        self.workers = workers
+        return True
+
+
+def ParallelMap(func=None, items=None, workers=None, kind='cpu', min_workers=1, max_workers=None,
+                window=1.0, verbose=False):
+    """
+    Run func(item) for every item on a thread pool and return the results in order.
+
+    With workers=None the pool starts at RecommendWorkers(kind) and then grows or shrinks one
+    worker at a time towards the best measured throughput (items completed per 'window'
+    seconds). OpenCV's thread count follows the pool size, see OpenCVThreads.
+
+    Args:
+        func (callable): The function to call for each item. It should release the GIL
+                         (OpenCV, NumPy, file I/O) for threads to help.
+        items (iterable): The inputs.
+        workers (int): A fixed number of workers, or None to tune it. Defaults to None.
+        kind (str): 'cpu' or 'io', for the starting point. Defaults to 'cpu'.
+        min_workers (int): Lower bound while tuning. Defaults to 1.
+        max_workers (int): Upper bound while tuning. Defaults to 4 x the usable CPUs.
+        window (float): Seconds of work between two tuning steps. Defaults to 1.0.
+        verbose (bool): Whether to display the tuning steps. Defaults to False.
+
+    Returns:
+        list: func(item) for every item, in order.
+
+    Example:
+        images = ParallelMap(ReadImage, paths, kind='io')
+    """
+    check_required_args(optional=('workers', 'max_workers'))
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        items = list(items)
+        if max_workers is None:
+            max_workers = max(min_workers, int(math.ceil(AvailableCPUs())) * 4)
+        max_workers = max(1, min(max_workers, len(items) or 1))
+        adaptive = workers is None
+        if adaptive:
+            workers = RecommendWorkers(kind, max_workers=max_workers)
+        workers = min(max(workers, min_workers, 1), max_workers)
+        tuner = _Tuner(workers, max(1, min_workers), max_workers if adaptive else workers, window)
+
+        results = [None] * len(items)
+        pending = {}
+        next_index = 0
+        with ThreadPoolExecutor(max_workers=tuner.max_workers) as executor:
+            cpus = AvailableCPUs()
+            previous_threads = cv2.getNumThreads()
+            cv2.setNumThreads(max(1, int(cpus // tuner.workers)))
+            try:
+                while next_index < len(items) or pending:
+                    while next_index < len(items) and len(pending) < tuner.workers:
+                        pending[executor.submit(func, items[next_index])] = next_index
+                        next_index += 1
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[pending.pop(future)] = future.result()
+                        if adaptive and tuner.completed():
+                            cv2.setNumThreads(max(1, int(cpus // tuner.workers)))
+                            if verbose:
+                                rate = tuner.history[-1][1]
+                                msg = f"{rate:.1f} items/s, now using {tuner.workers} worker(s)."
+                                ShowInfo(msg, caller_filename, caller_line)
+            finally:
+                cv2.setNumThreads(previous_threads)
+        return results
+
+    except Exception as e:
+        msg = f"Error running the parallel map: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
+
+
+SHARD_METHODS = ('sorted', 'hash', 'size')
+
+# (rank, world size) environment variables of common launchers, in order of preference
+SHARD_ENVIRONMENT = [('RANK', 'WORLD_SIZE'), ('SLURM_PROCID', 'SLURM_NTASKS'),
+                     ('OMPI_COMM_WORLD_RANK', 'OMPI_COMM_WORLD_SIZE'), ('PMI_RANK', 'PMI_SIZE')]
+
+
+def ShardFromEnvironment():
+    """
+    Returns:
+        tuple: (rank, world_size) from torchrun/Slurm/MPI environment variables, or (0, 1).
+    """
+    for rank_name, size_name in SHARD_ENVIRONMENT:
+        if rank_name in os.environ and size_name in os.environ:
+            return int(os.environ[rank_name]), int(os.environ[size_name])
+    return 0, 1
+
+
+def _shard_key(item):
+    return item if isinstance(item, str) else str(item)
+
+
+def _stable_hash(key):
+    # Not hash(): that is salted per process for strings
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'little')
+
+
+def _stat(path):
+    # (size, mtime in ns), or (0, None) for paths that cannot be stat'ed
+    try:
+        info = os.stat(path)
+    except OSError:
+        return 0, None
+    return info.st_size, info.st_mtime_ns
+
+
+def FileSizes(paths, cache_path=None, verify=False):
+    """
+    Sizes in bytes of 'paths', from a JSON stat cache when given, so that every process and node
+    does not have to stat the whole dataset again (on network file systems that can take minutes).
+
+    The cache keeps each file's size and mtime, and the mtime of every directory. Directories are
+    stat'ed on every call (a few per thousand files); the files of a directory whose mtime changed
+    (files added, removed, renamed or replaced) are stat'ed again and updated when their mtime
+    differs. Files rewritten in place without touching their directory are only noticed with
+    verify=True, which stats every file. If the cache cannot be written, the sizes are still
+    returned.
+
+    Args:
+        paths (iterable): The file paths.
+        cache_path (str): JSON file to keep the sizes in. Defaults to None (no cache).
+        verify (bool): Stat every file instead of trusting unchanged directories. Defaults to False.
+
+    Returns:
+        dict: path -> size (0 for paths that cannot be stat'ed).
+    """
+    paths = list(paths)
+    cache = {}
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            with open(cache_path) as handle:
+                cache = json.load(handle)
+        except (OSError, ValueError):
+            cache = {}
+    if not isinstance(cache.get('files'), dict) or not isinstance(cache.get('dirs'), dict):
+        # Missing, damaged or the old path -> size format: start over
+        cache = {'files': {}, 'dirs': {}}
+    files, dirs = cache['files'], cache['dirs']
+
+    changed_dirs, modified = set(), False
+    for directory in {os.path.dirname(path) for path in paths}:
+        mtime = _stat(directory or '.')[1]
+        if verify or dirs.get(directory) != mtime:
+            changed_dirs.add(directory)
+            dirs[directory], modified = mtime, True
+
+    sizes = {}
+    for path in paths:
+        entry = files.get(path)
+        if entry is None or os.path.dirname(path) in changed_dirs:
+            size, mtime = _stat(path)
+            if entry != [size, mtime]:
+                files[path], modified = [size, mtime], True
+        else:
+            size = entry[0]
+        sizes[path] = size
+
+    if cache_path is not None and modified:
+        # Several processes may write the same cache; each replaces it atomically
+        temporary = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'w') as handle:
+                json.dump(cache, handle)
+            os.replace(temporary, cache_path)
+        except OSError as e:
+            # Read-only or full cache location: the sizes are still good, only not saved
+            warnings.warn(f"Could not write the stat cache '{cache_path}': {e}")
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+    return sizes
+
+
+def ShardItems(items=None, rank=None, world_size=None, method='sorted', sizes=None, stat_cache=None):
+    """
+    The share of 'items' that belongs to worker 'rank' out of 'world_size', identical on every
+    host no matter in which order the items were listed.
+
+    Methods:
+        'sorted': sort the items and deal them out round-robin (even file counts).
+        'hash': assign each item by a stable hash of its name, so adding or removing files only
+                moves those files between shards.
+        'size': balance the total bytes per shard (largest items first, each to the lightest
+                shard), for datasets whose file sizes vary a lot.
+
+    Args:
+        items (iterable): Paths or other items (compared through str()).
+        rank (int): This worker's index. Defaults to ShardFromEnvironment().
+        world_size (int): Number of workers. Defaults to ShardFromEnvironment().
+        method (str): 'sorted', 'hash' or 'size'. Defaults to 'sorted'.
+        sizes (dict): item -> size for method='size'. Defaults to the file sizes (see FileSizes).
+        stat_cache (str): JSON file caching the file sizes for method='size'. Defaults to None.
+
+    Returns:
+        list: This worker's items, sorted.
+
+    Example:
+        paths = ShardItems(ReadDirectoryContents('/data/*.jpg'), rank=2, world_size=8, method='size',
+                           stat_cache='/data/.sizes.json')
+    """
+    check_required_args(optional=('rank', 'world_size', 'sizes', 'stat_cache'))
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        if rank is None or world_size is None:
+            environment_rank, environment_size = ShardFromEnvironment()
+            rank = environment_rank if rank is None else rank
+            world_size = environment_size if world_size is None else world_size
+        if world_size < 1 or not 0 <= rank < world_size:
+            msg = f"Invalid shard: rank {rank} of world size {world_size}."
+            HandleError(msg, caller_filename, caller_line)
+        if method not in SHARD_METHODS:
+            msg = f"Unsupported method: {method}. Please use 'sorted', 'hash', or 'size'."
+            HandleError(msg, caller_filename, caller_line)
+
+        # Duplicates (e.g. overlapping patterns) would otherwise land on two shards
+        by_key = {}
+        for item in items:
+            by_key.setdefault(_shard_key(item), item)
+        keys = sorted(by_key)
+
+        if method == 'sorted':
+            mine = keys[rank::world_size]
+        elif method == 'hash':
+            mine = [key for key in keys if _stable_hash(key) % world_size == rank]
+        else:
+            if sizes is None:
+                sizes = FileSizes(keys, stat_cache)
+            else:
+                sizes = {_shard_key(item): size for item, size in sizes.items()}
+            shards = [(0, index) for index in range(world_size)]
+            mine = []
+            for key in sorted(keys, key=lambda key: (-sizes.get(key, 0), key)):
+                total, index = heapq.heappop(shards)
+                if index == rank:
+                    mine.append(key)
+                heapq.heappush(shards, (total + sizes.get(key, 0), index))
+            mine.sort()
+        return [by_key[key] for key in mine]
+
+    except Exception as e:
+        msg = f"Error sharding the items: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return []
@@ -0,0 +1,230 @@
+# https://github.com/abdkhanstd/abdutils
+import multiprocessing
+import os
+import queue
+from collections import namedtuple
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from PIL import Image
+
+
+# What travels between processes instead of the pixels: a few dozen bytes when pickled
+SharedImage = namedtuple('SharedImage', ['slot', 'shape', 'dtype', 'mode'])
+
+
+def _attach(name):
+    # Workers started from the ring's creator share its resource tracker, so attaching here does
+    # not make the segment go away when a worker exits; the creator unlinks it in Unlink()
+    return SharedMemory(name=name)
+
+
+class SharedImageRing(object):
+    """
+    A fixed ring of shared-memory segments for handing images between processes without
+    pickling the pixels: the producer copies (or writes) an image into a free slot and sends the
+    small SharedImage handle; the consumer maps the same memory and releases the slot when done,
+    so segments are recycled instead of being created per image. Get never releases: copy what
+    must outlive the slot, then call Release exactly once (a second Release raises ValueError).
+
+    The ring is created once in the parent and passed to the workers (Process args or a pool
+    initializer). When all slots are in use, Put/Acquire wait, which also bounds the memory held
+    by a pipeline; so consume handles as they arrive (as_completed, not executor.map, whose
+    in-order results can leave every slot with results that are not read yet). A worker that
+    fails between taking a slot and returning its handle must release it, or the ring loses the
+    slot for good; ResizeImage & co. already do this when given pool=ring.
+
+    Like BufferPool it has Acquire(shape, dtype) and Release, so it can be given as pool= to
+    ResizeImage, ConvertToGrayscale, ConvertToRGB and ApplyFilter to write their result straight
+    into shared memory.
+
+    Example:
+        ring = SharedImageRing(slots=16, shape=(1080, 1920, 3))
+
+        def init(shared_ring):
+            global ring
+            ring = shared_ring
+
+        def load(path):                          # in a worker process
+            return ring.Put(ReadImage(path, method='CV2'))
+
+        with ProcessPoolExecutor(4, initializer=init, initargs=(ring,)) as executor:
+            for future in as_completed([executor.submit(load, path) for path in paths]):
+                handle = future.result()
+                image = ring.Get(handle)          # no copy
+                try:
+                    process(image)
+                finally:
+                    ring.Release(handle)
+        ring.Unlink()
+    """
+
+    def __init__(self, slots=8, slot_bytes=None, shape=None, dtype=np.uint8, context=None):
+        """
+        Args:
+            slots (int): Number of segments. Defaults to 8.
+            slot_bytes (int): Size of each segment in bytes.
+            shape (tuple): Alternatively, the largest image shape the ring has to hold.
+            dtype (numpy.dtype): The pixel type used with 'shape'. Defaults to uint8.
+            context (str): multiprocessing start method of the workers ('fork', 'spawn',
+                           'forkserver'). Defaults to the default context.
+        """
+        if slot_bytes is None:
+            if shape is None:
+                raise ValueError("Please give 'slot_bytes' or the largest image 'shape'.")
+            slot_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._segments = [SharedMemory(create=True, size=slot_bytes) for _ in range(slots)]
+        self.names = [segment.name for segment in self._segments]
+        context = multiprocessing.get_context(context)
+        self._free = context.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        # 1 while a slot is taken, shared by all processes, so a second Release is caught
+        self._taken = context.Array('b', slots)
+        self._owner = os.getpid()
+        self._created = list(self._segments)
+        self._addresses = None
+
+    def __getstate__(self):
+        # Workers get the segment names and the shared free list, and attach on first use
+        return {'slots': self.slots, 'slot_bytes': self.slot_bytes, 'names': self.names,
+                '_free': self._free, '_taken': self._taken, '_owner': self._owner}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._segments = [None] * self.slots
+        self._created = []
+        self._addresses = None
+
+    def _segment(self, slot):
+        segment = self._segments[slot]
+        if segment is None:
+            segment = self._segments[slot] = _attach(self.names[slot])
+        return segment
+
+    def _view(self, slot, shape, dtype):
+        return np.ndarray(shape, dtype=dtype, buffer=self._segment(slot).buf)
+
+    def _take(self, nbytes, timeout):
+        if nbytes > self.slot_bytes:
+            raise ValueError(f"Image of {nbytes} bytes does not fit into the ring's {self.slot_bytes}-byte slots.")
+        try:
+            slot = self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No free slot in the shared image ring.") from None
+        self._taken[slot] = 1
+        return slot
+
+    def Put(self, image, timeout=None):
+        """
+        Copy an image (numpy array or PIL Image) into a free slot.
+
+        Args:
+            image (numpy.ndarray or PIL.Image.Image): The image.
+            timeout (float): Seconds to wait for a free slot. Defaults to waiting forever.
+
+        Returns:
+            SharedImage: The handle to send to another process.
+        """
+        mode = image.mode if isinstance(image, Image.Image) else None
+        array = np.asarray(image)
+        slot = self._take(array.nbytes, timeout)
+        try:
+            self._view(slot, array.shape, array.dtype)[...] = array
+        except BaseException:
+            self.Release(slot)
+            raise
+        return SharedImage(slot, array.shape, array.dtype.str, mode)
+
+    def Acquire(self, shape, dtype=np.uint8, timeout=None):
+        """
+        A free slot as an array of the given shape, to write an image into directly
+        (e.g. ResizeImage(..., pool=ring)). Get its handle with Handle(array).
+        """
+        dtype = np.dtype(dtype)
+        slot = self._take(int(np.prod(shape)) * dtype.itemsize, timeout)
+        return self._view(slot, tuple(shape), dtype)
+
+    def _slot_of(self, array):
+        if self._addresses is None or None in self._addresses:
+            self._addresses = [np.frombuffer(self._segment(slot).buf, dtype=np.uint8).ctypes.data
+                               for slot in range(self.slots)]
+        address = array.__array_interface__['data'][0]
+        for slot, start in enumerate(self._addresses):
+            if start <= address < start + self.slot_bytes:
+                return slot
+        raise ValueError("The array does not live in this shared image ring.")
+
+    def Handle(self, array, mode=None):
+        """
+        The SharedImage handle of an array obtained from Acquire.
+        """
+        return SharedImage(self._slot_of(array), array.shape, array.dtype.str, mode)
+
+    def Get(self, handle):
+        """
+        The image behind a handle: a NumPy view of the shared memory, or a PIL Image for handles
+        made from one, valid until the slot is released. The slot stays taken; use
+        ring.Get(handle).copy() (or image.copy()) before Release to keep the pixels.
+        """
+        if not self._taken[handle.slot]:
+            raise ValueError(f"Slot {handle.slot} of the shared image ring is not in use (already released?).")
+        view = self._view(handle.slot, handle.shape, np.dtype(handle.dtype))
+        if handle.mode is not None:
+            return Image.fromarray(view, handle.mode)
+        return view
+
+    def Release(self, handle):
+        """
+        Give a slot back to the ring, from any process: a SharedImage, an array from Acquire/Get,
+        or a slot index. Releasing a slot that is not in use raises ValueError.
+        """
+        if isinstance(handle, SharedImage):
+            slot = handle.slot
+        elif isinstance(handle, np.ndarray):
+            slot = self._slot_of(handle)
+        else:
+            slot = int(handle)
+        with self._taken.get_lock():
+            if not self._taken[slot]:
+                raise ValueError(f"Slot {slot} of the shared image ring is not in use (released twice?).")
+            self._taken[slot] = 0
+        self._free.put(slot)
+
+    def Close(self):
+        """
+        Unmap the segments in this process. Views returned by Get/Acquire must be gone by then.
+        """
+        for slot, segment in enumerate(self._segments):
+            if segment is not None:
+                segment.close()
+                self._segments[slot] = None
+        self._addresses = None
+
+    def Unlink(self):
+        """
+        Close and destroy the segments. Only the process that created the ring can do this,
+        once all workers are done.
+        """
+        if os.getpid() != self._owner:
+            return
+        self.Close()
+        for segment in self._created:
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                continue
+        self._created = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Unlink() if os.getpid() == self._owner else self.Close()
+        return False
+
+    def __repr__(self):
+        return f"SharedImageRing(slots={self.slots}, slot_bytes={self.slot_bytes})"
@@ -0,0 +1,199 @@
+# https://github.com/abdkhanstd/abdutils
+import bisect
+import functools
+import inspect
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+
+# Latency histogram buckets: 1 us to ~3 hours, four buckets per doubling (~19% wide)
+BUCKET_BOUNDS = [1e-6 * 2 ** (index / 4) for index in range(134)]
+
+# Exported functions that are never wrapped
+NOT_INSTRUMENTED = {'HandleError', 'EnableStats', 'DisableStats', 'ResetStats', 'GetStats', 'PrintStats', 'stats'}
+
+_records = {}
+_records_lock = threading.Lock()
+_originals = {}
+
+
+class _Record(object):
+    __slots__ = ('calls', 'errors', 'total', 'min', 'max', 'bytes', 'buckets', 'lock')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.bytes = 0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.lock = threading.Lock()
+
+    def add(self, seconds, nbytes, failed):
+        bucket = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        with self.lock:
+            self.calls += 1
+            self.errors += failed
+            self.total += seconds
+            self.min = min(self.min, seconds)
+            self.max = max(self.max, seconds)
+            self.bytes += nbytes
+            self.buckets[bucket] += 1
+
+    def percentile(self, fraction):
+        # Geometric middle of the bucket holding the requested rank, clamped to the observed range
+        rank = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                if bucket == 0:
+                    return self.min
+                if bucket == len(BUCKET_BOUNDS):
+                    return self.max
+                middle = (BUCKET_BOUNDS[bucket - 1] * BUCKET_BOUNDS[bucket]) ** 0.5
+                return min(max(middle, self.min), self.max)
+        return 0.0
+
+
+def _nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value if isinstance(item, (np.ndarray, Image.Image)))
+    return 0
+
+
+def _record(name):
+    record = _records.get(name)
+    if record is None:
+        with _records_lock:
+            record = _records.setdefault(name, _Record())
+    return record
+
+
+def _instrument(name, func):
+    record = _record(name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Bytes processed: the images passed in, or the image returned by readers
+        nbytes = sum(_nbytes(value) for value in args) + sum(_nbytes(value) for value in kwargs.values())
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            seconds = time.perf_counter() - start
+            if not failed and not nbytes:
+                nbytes = _nbytes(result)
+            record.add(seconds, nbytes, failed)
+
+    wrapper.__wrapped_by_abdstats__ = True
+    return wrapper
+
+
+def EnableStats():
+    """
+    Start recording calls to the functions exported by abdutils (abd.ReadImage, abd.ResizeImage, ...).
+
+    The functions are replaced in the abdutils namespace, so only calls made through it are
+    recorded; names bound earlier with 'from abdutils import X' keep the unwrapped function,
+    and calls made inside abdutils are not counted twice. DisableStats puts the original
+    functions back, so there is no overhead at all while stats are off.
+    """
+    package = sys.modules['abdutils']
+    for name, value in vars(package).items():
+        if name in NOT_INSTRUMENTED or name.startswith('_') or name in _originals:
+            continue
+        if inspect.isfunction(value) and value.__module__.startswith('abdutils'):
+            _originals[name] = value
+    for name, func in _originals.items():
+        if not getattr(getattr(package, name), '__wrapped_by_abdstats__', False):
+            setattr(package, name, _instrument(name, func))
+
+
+def DisableStats():
+    """
+    Stop recording and restore the original functions. Collected stats are kept.
+    """
+    package = sys.modules['abdutils']
+    for name, func in _originals.items():
+        setattr(package, name, func)
+    _originals.clear()
+
+
+def ResetStats():
+    """
+    Forget all collected stats.
+    """
+    with _records_lock:
+        for record in _records.values():
+            with record.lock:
+                record.__init__()
+
+
+def GetStats():
+    """
+    Returns:
+        dict: Per function name (only functions called at least once): 'calls', 'errors',
+              'total_seconds', 'mean_seconds', 'min_seconds', 'max_seconds', 'p50_seconds',
+              'p95_seconds', 'p99_seconds' and 'bytes' (image bytes processed).
+    """
+    stats = {}
+    with _records_lock:
+        records = list(_records.items())
+    for name, record in records:
+        with record.lock:
+            if not record.calls:
+                continue
+            stats[name] = {
+                'calls': record.calls,
+                'errors': record.errors,
+                'total_seconds': record.total,
+                'mean_seconds': record.total / record.calls,
+                'min_seconds': record.min,
+                'max_seconds': record.max,
+                'p50_seconds': record.percentile(0.50),
+                'p95_seconds': record.percentile(0.95),
+                'p99_seconds': record.percentile(0.99),
+                'bytes': record.bytes,
+            }
+    return stats
+
+
+stats = GetStats
+
+
+def PrintStats(sort_by='total_seconds', limit=None):
+    """
+    Print the collected stats as a table, slowest functions first.
+
+    Args:
+        sort_by (str): Column to sort by (a GetStats key). Defaults to 'total_seconds'.
+        limit (int): Only print the first 'limit' rows. Defaults to all.
+
+    Returns:
+        str: The printed table.
+    """
+    rows = sorted(GetStats().items(), key=lambda item: item[1][sort_by], reverse=True)[:limit]
+    header = (f"{'Function':<28} {'Calls':>8} {'Total s':>10} {'Mean ms':>10} {'p50 ms':>9} "
+              f"{'p95 ms':>9} {'p99 ms':>9} {'MB':>10}")
+    lines = [header, '-' * len(header)]
+    for name, item in rows:
+        lines.append(f"{name:<28} {item['calls']:>8} {item['total_seconds']:>10.3f} "
+                     f"{item['mean_seconds'] * 1000:>10.3f} {item['p50_seconds'] * 1000:>9.3f} "
+                     f"{item['p95_seconds'] * 1000:>9.3f} {item['p99_seconds'] * 1000:>9.3f} "
+                     f"{item['bytes'] / 2**20:>10.1f}")
+    table = '\n'.join(lines)
+    print(table)
+    return table
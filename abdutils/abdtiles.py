@@ -0,0 +1,276 @@
+# https://github.com/abdkhanstd/abdutils
+import os
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .abdutil import HandleError, ShowInfo, get_caller_info
+from .abdparallel import OpenCVThreads, RecommendWorkers
+
+# tifffile is optional; it is only needed to memory-map (uncompressed) TIFF files
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+
+RAW_EXTENSIONS = ('.raw', '.bin', '.dat')
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+
+TILED_INTERPOLATION_MAP = {
+    'CV_NEAREST': cv2.INTER_NEAREST,
+    'CV_LINEAR': cv2.INTER_LINEAR,
+    'CV_CUBIC': cv2.INTER_CUBIC,
+}
+
+# Extra source pixels read around each resized tile (enough for bicubic support)
+RESIZE_HALO = 3
+
+
+def OpenImageMemmap(path=None, shape=None, dtype='uint8', mode='r'):
+    """
+    Open an image file as a memory-mapped array, so only the parts that are touched are read.
+
+    Args:
+        path (str): A '.npy' file, an uncompressed TIFF (requires tifffile), or a raw file
+                    ('.raw', '.bin', '.dat') for which 'shape' must be given.
+        shape (tuple): The (height, width[, channels]) of a raw file.
+        dtype (str or numpy.dtype): The pixel type of a raw file. Defaults to 'uint8'.
+        mode (str): The memmap mode ('r', 'r+' or 'c'). Defaults to 'r'.
+
+    Returns:
+        numpy.memmap: The memory-mapped image.
+    """
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.npy':
+            return np.load(path, mmap_mode=mode)
+        if extension in TIFF_EXTENSIONS:
+            if tifffile is None:
+                msg = "Memory-mapping TIFF files requires the 'tifffile' package (pip install tifffile)."
+                HandleError(msg, caller_filename, caller_line)
+            return tifffile.memmap(path, mode=mode)
+        if shape is None:
+            msg = f"Input 'shape' is required to memory-map the raw file '{path}'."
+            HandleError(msg, caller_filename, caller_line)
+        return np.memmap(path, dtype=dtype, mode=mode, shape=tuple(shape))
+
+    except Exception as e:
+        msg = f"Error memory-mapping the image: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
+
+
+def CreateImageMemmap(path=None, shape=None, dtype='uint8'):
+    """
+    Create an image file of the given shape and return it as a writable memory-mapped array.
+
+    Args:
+        path (str): A '.npy', '.tif'/'.tiff' (requires tifffile) or raw ('.raw', '.bin', '.dat') file.
+        shape (tuple): The (height, width[, channels]) of the image.
+        dtype (str or numpy.dtype): The pixel type. Defaults to 'uint8'.
+
+    Returns:
+        numpy.memmap: The memory-mapped image, opened for writing.
+    """
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        shape = tuple(shape)
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.npy':
+            return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+        if extension in TIFF_EXTENSIONS:
+            if tifffile is None:
+                msg = "Writing memory-mapped TIFF files requires the 'tifffile' package (pip install tifffile)."
+                HandleError(msg, caller_filename, caller_line)
+            photometric = 'rgb' if len(shape) == 3 and shape[2] in (3, 4) else 'minisblack'
+            return tifffile.memmap(path, shape=shape, dtype=dtype, photometric=photometric)
+        if extension in RAW_EXTENSIONS:
+            return np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+
+        msg = f"Unsupported output format '{extension}'. Please use '.npy', '.tif', '.tiff', '.raw', '.bin' or '.dat'."
+        HandleError(msg, caller_filename, caller_line)
+
+    except Exception as e:
+        msg = f"Error creating the memory-mapped image: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
+
+
+def _read_window(image, top, bottom, left, right):
+    """
+    Read image[top:bottom, left:right], mirroring (BORDER_REFLECT_101) whatever falls outside
+    the image so that tiles see the same borders as a whole-image OpenCV filter.
+    """
+    height, width = image.shape[:2]
+    window = np.ascontiguousarray(image[max(top, 0):min(bottom, height), max(left, 0):min(right, width)])
+    pads = (max(-top, 0), max(bottom - height, 0), max(-left, 0), max(right - width, 0))
+    if any(pads):
+        window = cv2.copyMakeBorder(window, *pads, cv2.BORDER_REFLECT_101)
+        if image.ndim == 3 and window.ndim == 2:
+            window = window[..., np.newaxis]
+    return window
+
+
+def _filter_tile(image, output, rows, cols, func, halo):
+    top, bottom = rows
+    left, right = cols
+    window = _read_window(image, top - halo, bottom + halo, left - halo, right + halo)
+    result = func(window)
+    if result.ndim == 2 and output.ndim == 3:
+        result = result[..., np.newaxis]
+    output[top:bottom, left:right] = result[halo:halo + bottom - top, halo:halo + right - left]
+
+
+def _resize_tile(image, output, rows, cols, scale_x, scale_y, interpolation):
+    top, bottom = rows
+    left, right = cols
+    height, width = image.shape[:2]
+
+    # Source coordinates of the output pixels, as used by cv2.resize
+    if interpolation == cv2.INTER_NEAREST:
+        source_x = np.minimum(np.floor(np.arange(left, right) * scale_x), width - 1).astype(np.float32)
+        source_y = np.minimum(np.floor(np.arange(top, bottom) * scale_y), height - 1).astype(np.float32)
+    else:
+        source_x = (np.arange(left, right, dtype=np.float32) + 0.5) * scale_x - 0.5
+        source_y = (np.arange(top, bottom, dtype=np.float32) + 0.5) * scale_y - 0.5
+    source_left = max(int(math.floor(source_x[0])) - RESIZE_HALO, 0)
+    source_top = max(int(math.floor(source_y[0])) - RESIZE_HALO, 0)
+    source_right = min(int(math.ceil(source_x[-1])) + RESIZE_HALO + 1, width)
+    source_bottom = min(int(math.ceil(source_y[-1])) + RESIZE_HALO + 1, height)
+
+    window = np.ascontiguousarray(image[source_top:source_bottom, source_left:source_right])
+    map_x, map_y = np.meshgrid(source_x - source_left, source_y - source_top)
+    result = cv2.remap(window, map_x, map_y, interpolation, borderMode=cv2.BORDER_REPLICATE)
+    if result.ndim == 2 and output.ndim == 3:
+        result = result[..., np.newaxis]
+    output[top:bottom, left:right] = result
+
+
+def ProcessImageTiled(src=None, dst=None, operation='GaussianBlur', tile_size=1024, workers=1,
+                      shape=None, dtype='uint8', halo=0, verbose=True, **params):
+    """
+    Apply an image operation tile by tile, so peak memory is bounded by tile size times worker count
+    instead of the image size.
+
+    Tiles are read with a halo (overlap) large enough for the operation and mirrored at the image
+    borders, so filters match the whole-image operation exactly. Tiled 'CV_NEAREST' resizing is exact,
+    'CV_LINEAR' and 'CV_CUBIC' match cv2.resize up to interpolation rounding.
+
+    Args:
+        src (str or numpy.ndarray): The input image: a path accepted by OpenImageMemmap or any array
+                                    (including a numpy.memmap).
+        dst (str or numpy.ndarray): Where to write the result: a path accepted by CreateImageMemmap,
+                                    a preallocated array, or None to return an in-memory array.
+        operation (str or callable): 'GaussianBlur' (sigma=), 'ApplyFilter' (kernel=), 'Resize'
+                                     (size=(width, height), interpolation='CV_LINEAR'), or a function
+                                     taking and returning a tile of the same size (set halo=).
+        tile_size (int): Edge length of the (output) tiles in pixels. Defaults to 1024.
+        workers (int): Number of threads processing tiles in parallel, or None for RecommendWorkers('cpu').
+                       Defaults to 1.
+        shape (tuple): The (height, width[, channels]) of a raw 'src' file.
+        dtype (str or numpy.dtype): The pixel type of a raw 'src' file. Defaults to 'uint8'.
+        halo (int): Overlap in pixels needed by a custom 'operation'. Defaults to 0.
+        verbose (bool): Whether to display verbose messages. Defaults to True.
+
+    Returns:
+        numpy.ndarray: The output array (a memmap when 'dst' is a path).
+
+    Example:
+        ProcessImageTiled('scan.tif', 'scan_blur.tif', 'GaussianBlur', sigma=3.0, workers=8)
+        ProcessImageTiled('scan.npy', 'scan_small.npy', 'Resize', size=(10000, 10000))
+    """
+    caller_filename, caller_line = get_caller_info()
+
+    if src is None:
+        msg = "The following input(s) /argument(s) are missing: src"
+        HandleError(msg, caller_filename, caller_line)
+
+    try:
+        image = OpenImageMemmap(src, shape, dtype) if isinstance(src, str) else src
+        height, width = image.shape[:2]
+        output_shape = image.shape
+
+        if operation == 'GaussianBlur':
+            sigma = params.get('sigma', 1.0)
+            if not isinstance(sigma, (int, float)) or sigma <= 0:
+                msg = "Input 'sigma' must be a positive number."
+                HandleError(msg, caller_filename, caller_line)
+            func = lambda tile: cv2.GaussianBlur(tile, (0, 0), sigmaX=sigma)
+            halo = int(math.ceil(4 * sigma)) + 1
+        elif operation == 'ApplyFilter':
+            kernel = np.asarray(params.get('kernel'), dtype=np.float32)
+            if kernel.ndim != 2:
+                msg = "Input 'kernel' must be a 2D NumPy array."
+                HandleError(msg, caller_filename, caller_line)
+            func = lambda tile: cv2.filter2D(tile, -1, kernel)
+            halo = max(kernel.shape)
+        elif operation == 'Resize':
+            size = params.get('size')
+            if not isinstance(size, tuple) or len(size) != 2:
+                msg = "Input 'size' must be a tuple of two integers (width, height)."
+                HandleError(msg, caller_filename, caller_line)
+            interpolation = params.get('interpolation', 'CV_LINEAR')
+            if interpolation not in TILED_INTERPOLATION_MAP:
+                msg = f"Unsupported interpolation for tiled resizing: {interpolation}. Please use 'CV_NEAREST', 'CV_LINEAR', or 'CV_CUBIC'."
+                HandleError(msg, caller_filename, caller_line)
+            interpolation = TILED_INTERPOLATION_MAP[interpolation]
+            output_shape = (size[1], size[0]) + tuple(image.shape[2:])
+            # Same rounding as cv2.resize, which inverts the output/input ratio
+            scale_x, scale_y = 1.0 / (size[0] / width), 1.0 / (size[1] / height)
+        elif callable(operation):
+            func = operation
+        else:
+            msg = f"Unsupported operation: {operation}. Please use 'GaussianBlur', 'ApplyFilter', 'Resize', or a function."
+            HandleError(msg, caller_filename, caller_line)
+
+        if dst is None:
+            output = np.empty(output_shape, dtype=image.dtype)
+        elif isinstance(dst, str):
+            output = CreateImageMemmap(dst, output_shape, image.dtype)
+        else:
+            output = dst
+            if output.shape != output_shape:
+                msg = f"Output array must have shape {output_shape}."
+                HandleError(msg, caller_filename, caller_line)
+
+        out_height, out_width = output_shape[:2]
+        tiles = [((top, min(top + tile_size, out_height)), (left, min(left + tile_size, out_width)))
+                 for top in range(0, out_height, tile_size)
+                 for left in range(0, out_width, tile_size)]
+
+        if workers is None:
+            # Each worker holds an input tile with its halo and the result
+            tile_bytes = (tile_size + 2 * halo) ** 2 * int(np.prod(image.shape[2:])) * image.dtype.itemsize
+            workers = RecommendWorkers('cpu', memory_per_worker=2 * tile_bytes, max_workers=len(tiles))
+
+        if verbose:
+            msg = f"Processing {len(tiles)} tiles of {tile_size}x{tile_size} with {workers} worker(s)..."
+            ShowInfo(msg, caller_filename, caller_line)
+
+        if operation == 'Resize':
+            task = lambda tile: _resize_tile(image, output, tile[0], tile[1], scale_x, scale_y, interpolation)
+        else:
+            task = lambda tile: _filter_tile(image, output, tile[0], tile[1], func, halo)
+
+        if workers > 1:
+            with OpenCVThreads(workers), ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(task, tiles))
+        else:
+            for tile in tiles:
+                task(tile)
+
+        if isinstance(output, np.memmap):
+            output.flush()
+
+        return output
+
+    except Exception as e:
+        msg = f"Error processing the image in tiles: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
@@ -6,7 +6,7 @@ import warnings
 import cv2
 import numpy as np
 from PIL import ImageFilter, Image, ImageEnhance
-from scipy.signal import convolve2d
+from scipy.signal import fftconvolve
 import matplotlib.pyplot as plt
 import inspect
 import sys
@@ -20,6 +20,11 @@ import os
 import subprocess
 import threading
 import platform
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from contextlib import contextmanager
+
+from .abdbuffers import _with_pooled
 
 import threading
 import time
@@ -27,44 +32,37 @@ import psutil
 import GPUtil
 import shutil
 
-# Function to get CPU, GPU, and Disk usage
+# Function to get CPU, GPU, and Disk usage (latest sample of the background sampler, no waiting)
 def get_system_usage():
-    cpu_usage = psutil.cpu_percent(interval=1)
-    gpus = GPUtil.getGPUs()
-    gpu_usages = [gpu.load * 100 for gpu in gpus] if gpus else ['N/A']
-    gpu_memory = [gpu.memoryUtil * 100 for gpu in gpus] if gpus else ['N/A']
-    disk_usage = psutil.disk_usage('/').percent
-    return cpu_usage, gpu_usages, gpu_memory, disk_usage
+    from .abdmonitor import GetSystemUsage
+    return GetSystemUsage()
 
 # Function to get the current console height
 def get_console_height():
     return shutil.get_terminal_size((80, 20)).lines
 
-# Function to update the system usage display
+# Function to update the system usage display (kept for code that ran it in its own thread:
+# it now starts the status line renderer and blocks while it runs, like the old loop did)
 def update_system_usage():
-    while True:
-        console_height = get_console_height()
-        cpu, gpu_usages, gpu_memory, disk = get_system_usage()
-        gpu_usage_str = ' | '.join([f"GPU {i}: {usage:.2f}%" for i, usage in enumerate(gpu_usages)])
-        gpu_memory_str = ' | '.join([f"Memory {i}: {memory:.2f}%" for i, memory in enumerate(gpu_memory)])
-        system_info = f"CPU: {cpu}% | {gpu_usage_str} | {gpu_memory_str} | Disk: {disk}%"
-
-        # Move cursor to the bottom line and print the system info
-        print(f"\033[{console_height};0H\033[K{system_info}", end='', flush=True)
-
+    status_line = ShowUsage()
+    while status_line.running:
         time.sleep(1)
 
 # Function to add a new message above the system usage
 def add_message(message):
-    console_height = get_console_height()
-    # Clear and move to the beginning of the line just above the bottom
-    print(f"\033[{console_height-1};0H\033[K", end='')
-    # Move up to make space for the new message
-    print(f"\033[1A{message}")
-
-# Start the system usage display in a separate thread
-def ShowUsage():
-    threading.Thread(target=update_system_usage, daemon=True).start()
+    from .abdmonitor import GetStatusLine
+    status_line = GetStatusLine()
+    if status_line.running:
+        status_line.Message(message)
+    else:
+        print(message)
+
+# Start the system usage display (and the application counters) on the renderer thread
+def ShowUsage(interval=1.0):
+    from .abdmonitor import GetStatusLine
+    status_line = GetStatusLine()
+    status_line.interval = interval
+    return status_line.Start()
     
 def ClearScreen():
     # Check if the operating system is Windows
@@ -84,6 +82,9 @@ def ExitHandler(signum, frame):
     if not exit_handler_executed:
         exit_handler_executed=True
         pid = os.getpid()
+        # The status line renderer would not get to print anything before the SIGKILL
+        from .abdmonitor import GetStatusLine
+        GetStatusLine().Stop(timeout=0.5)
         msg = f"[🛑 Interrupted] Stopping your code and Killing PID {pid}"
         print(msg)
         
@@ -102,9 +103,14 @@ def ExitHandler(signum, frame):
         exit_handler_executed = True
             
 # Function to start Ctrl+C capture as a side daemon
-def LookForKeys():
+def LookForKeys(graceful=False):
+    # graceful=True: the first Ctrl+C only requests a stop (see abdjobs.RunJob), the second one kills
+    if graceful:
+        from .abdjobs import EnableGracefulStop
+        EnableGracefulStop()
+        return
+
     # Set up a handler for Ctrl+C (SIGINT)
-            
     signal.signal(signal.SIGINT, ExitHandler)
     signal.signal(signal.SIGTSTP, ExitHandler)
 
@@ -139,7 +145,44 @@ def SelectGPU():
         print(f"Error: {e}")
         return None
 
+class AbdutilsError(Exception):
+    """
+    Raised by HandleError instead of exiting inside a RaiseErrors() block (and in abdutils.aio).
+    """
+
+
+# Per-thread switch between exiting (the default) and raising AbdutilsError
+_error_mode = threading.local()
+
+
+@contextmanager
+def RaiseErrors():
+    """
+    Inside this block, errors in abdutils functions raise AbdutilsError instead of printing the
+    message and exiting, so servers and event loops can handle them. Applies to the current thread.
+
+    Example:
+        with RaiseErrors():
+            try:
+                image = ReadImage(path)
+            except AbdutilsError as e:
+                log.warning(e)
+    """
+    previous = getattr(_error_mode, 'raise_errors', False)
+    _error_mode.raise_errors = True
+    try:
+        yield
+    finally:
+        _error_mode.raise_errors = previous
+
+
 def HandleError(msg, caller_filename, caller_line):    
+    if getattr(_error_mode, 'raise_errors', False):
+        # The outer 'except Exception' of a function passes our own error back in: keep the first message
+        current = sys.exc_info()[1]
+        if isinstance(current, AbdutilsError):
+            raise current
+        raise AbdutilsError(msg)
     print(f"[🚫 Error: {caller_filename}, line {caller_line}] " + msg)
     exit(0)
     
@@ -149,7 +192,8 @@ def ShowInfo(msg, caller_filename, caller_line):
 def ShowWarning(msg, caller_filename, caller_line):    
     print(f"[⚠️ Warning: {caller_filename}, line {caller_line}] " + msg)    
 
-def check_required_args():
+def check_required_args(optional=()):
+    # Arguments listed in 'optional' may legitimately be None
     # Get the calling function's frame
     caller_frame = inspect.currentframe().f_back
     # Get the calling function's arguments
@@ -158,10 +202,10 @@ def check_required_args():
     # Extract argument names of the calling function
     func_arg_names = inspect.getfullargspec(caller_frame.f_globals[caller_frame.f_code.co_name]).args
 
-    missing_args = [arg_name for arg_name in func_arg_names if caller_args[arg_name] is None]
+    missing_args = [arg_name for arg_name in func_arg_names if caller_args[arg_name] is None and arg_name not in optional]
 
     if missing_args:
-        caller_frame = sys._getframe(2)  # Get the caller's frame (1 level up in the call stack)
+        caller_frame = _skip_stats_frames(sys._getframe(2))  # Get the caller's frame (1 level up in the call stack)
         caller_line = caller_frame.f_lineno  # Get the caller's line number
         caller_filename = caller_frame.f_globals.get('__file__')  # Get the caller's filename
 
@@ -170,8 +214,15 @@ def check_required_args():
         
 
        
+def _skip_stats_frames(frame):
+    # The wrappers installed by EnableStats sit between a function and its caller
+    while frame.f_back is not None and frame.f_globals.get('__name__') == 'abdutils.abdstats':
+        frame = frame.f_back
+    return frame
+
+
 def get_caller_info():    
-    caller_frame = sys._getframe(2)
+    caller_frame = _skip_stats_frames(sys._getframe(2))
     caller_line = caller_frame.f_lineno
     caller_filename = caller_frame.f_globals.get('__file__')
     return caller_filename, caller_line
@@ -186,7 +237,7 @@ def PrintObject(obj):
 
 
 
-def ReadDirectoryContents(path_pattern=None, verbose=True):
+def ReadDirectoryContents(path_pattern=None, verbose=True, shard=None, shard_method='sorted', stat_cache=None):
     """
     Reads the contents of a directory based on the provided pattern and returns a list of matched items.
 
@@ -194,16 +245,25 @@ def ReadDirectoryContents(path_pattern=None, verbose=True):
         path_pattern (str): The path pattern to match files and directories. 
                             For example: '/home/tt/*.jpg' or '/home/tt/*.*' or '/home/tt/'
         verbose (bool): Whether to display verbose messages. Defaults to True.
+        shard (tuple or str): Only return the share of worker (rank, world_size), or 'auto' to take
+                              them from the RANK/WORLD_SIZE (or Slurm/MPI) environment. Defaults to None.
+        shard_method (str): 'sorted', 'hash' or 'size' (even bytes per worker), see ShardItems.
+                            Defaults to 'sorted'.
+        stat_cache (str): JSON file caching file sizes for shard_method='size'. Defaults to None.
 
     Returns:
-        list: A list of matched items based on the provided pattern.
+        list: A list of matched items based on the provided pattern (sorted when sharded).
     """
     
-    check_required_args()
+    check_required_args(optional=('shard', 'stat_cache'))
     caller_filename, caller_line=get_caller_info()
         
     try:
         matched_items = glob.glob(path_pattern)
+        if shard is not None:
+            from .abdparallel import ShardItems
+            rank, world_size = (None, None) if shard == 'auto' else shard
+            matched_items = ShardItems(matched_items, rank, world_size, shard_method, stat_cache=stat_cache)
         if verbose:
             msg=(f"Found {len(matched_items)} items matching the pattern '{path_pattern}'.")
 
@@ -656,7 +716,8 @@ def ReadImage(image_path=None, mode='RGB', method='auto'):
                 if mode == 'RGB':
                     img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
             else:
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+                # Swap channels in place instead of allocating a second full-size array
+                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
 
         # Raise error for unsupported methods
         else:
@@ -746,7 +807,7 @@ def SaveImage(image=None, save_path=None, method='auto'):
 
 
 
-def ConvertToGrayscale(image=None, method='auto'):
+def ConvertToGrayscale(image=None, method='auto', pool=None):
     """
     Convert an image to grayscale.
 
@@ -754,6 +815,7 @@ def ConvertToGrayscale(image=None, method='auto'):
         image (PIL.Image.Image or numpy.ndarray): The input image.
         method (str): The method to use for converting the image ('auto', 'PIL', or 'CV2').
                       Defaults to 'auto' which automatically detects the input type.
+        pool (BufferPool): Optional pool the cv2 output array is taken from (see BufferPool).
 
     Returns:
         PIL.Image.Image or numpy.ndarray: The grayscale image.
@@ -771,7 +833,7 @@ def ConvertToGrayscale(image=None, method='auto'):
         # Convert an image to grayscale using the 'CV2' method
         grayscale_image = ConvertToGrayscale(image, method='CV2')
     """
-    check_required_args()
+    check_required_args(optional=('pool',))
     caller_filename, caller_line=get_caller_info()
           
     try:
@@ -783,7 +845,7 @@ def ConvertToGrayscale(image=None, method='auto'):
                 if len(image.shape) == 2:
                     return image
                 elif len(image.shape) == 3 and image.shape[2] == 3:
-                    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+                    return _with_pooled(pool, image.shape[:2], image.dtype, cv2.cvtColor, image, cv2.COLOR_RGB2GRAY)
                 else:
                     msg="Unsupported image format for automatic conversion to grayscale."
                     HandleError(msg,caller_filename, caller_line)
@@ -801,7 +863,7 @@ def ConvertToGrayscale(image=None, method='auto'):
                 if len(image.shape) == 2:
                     return image
                 elif len(image.shape) == 3 and image.shape[2] == 3:
-                    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+                    return _with_pooled(pool, image.shape[:2], image.dtype, cv2.cvtColor, image, cv2.COLOR_RGB2GRAY)
                 else:
                     msg="Unsupported image format for 'CV2' conversion to grayscale."
                     HandleError(msg,caller_filename, caller_line)
@@ -816,7 +878,7 @@ def ConvertToGrayscale(image=None, method='auto'):
         HandleError(msg,caller_filename, caller_line)
         return None
 
-def ConvertToRGB(image=None, method='auto'):
+def ConvertToRGB(image=None, method='auto', pool=None):
     """
     Convert an image to RGB color mode.
 
@@ -824,6 +886,7 @@ def ConvertToRGB(image=None, method='auto'):
         image (PIL.Image.Image or numpy.ndarray): The input image.
         method (str): The method to use for conversion ('auto', 'PIL', or 'CV2').
                       Defaults to 'auto' which automatically detects the input type.
+        pool (BufferPool): Optional pool the cv2 output array is taken from (see BufferPool).
 
     Returns:
         PIL.Image.Image or numpy.ndarray: The image converted to RGB color mode.
@@ -841,7 +904,7 @@ def ConvertToRGB(image=None, method='auto'):
         # Convert an image to RGB color mode using the 'CV2' method
         rgb_image = ConvertToRGB(image, method='CV2')
     """
-    check_required_args()
+    check_required_args(optional=('pool',))
     caller_filename, caller_line=get_caller_info()
               
     try:
@@ -861,7 +924,7 @@ def ConvertToRGB(image=None, method='auto'):
                 elif len(image.shape) == 3 and image.shape[2] == 3:
                     return image
                 elif len(image.shape) == 3 and image.shape[2] == 1:
-                    return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+                    return _with_pooled(pool, image.shape[:2] + (3,), image.dtype, cv2.cvtColor, image, cv2.COLOR_GRAY2RGB)
                 else:
                     msg="Unsupported image format for automatic conversion to RGB."
                     HandleError(msg,caller_filename, caller_line)
@@ -888,7 +951,7 @@ def ConvertToRGB(image=None, method='auto'):
                 elif len(image.shape) == 3 and image.shape[2] == 3:
                     return image
                 elif len(image.shape) == 3 and image.shape[2] == 1:
-                    return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+                    return _with_pooled(pool, image.shape[:2] + (3,), image.dtype, cv2.cvtColor, image, cv2.COLOR_GRAY2RGB)
                 else:
                     msg="Unsupported image format for 'CV2' conversion to RGB."
                     HandleError(msg,caller_filename, caller_line)
@@ -994,9 +1057,35 @@ def GetImageSize(image=None, method='auto'):
         HandleError(msg,caller_filename, caller_line)
         return 0, 0, 0
 
-def ResizeImage(image=None, size=None, verbose=True, interpolation='IANTIALIAS'):
+# Map shorthand names to interpolation flags (Image.ANTIALIAS was removed in Pillow 10; it is LANCZOS)
+RESIZE_INTERPOLATION_MAP = {
+    'NB': Image.NEAREST,
+    'IBOX': Image.BOX,
+    'IBILINEAR': Image.BILINEAR,
+    'IHAMMING': Image.HAMMING,
+    'IBICUBIC': Image.BICUBIC,
+    'ILANCZOS': Image.LANCZOS,
+    'IANTIALIAS': getattr(Image, 'ANTIALIAS', Image.LANCZOS),
+    'CV_NEAREST': cv2.INTER_NEAREST,
+    'CV_LINEAR': cv2.INTER_LINEAR,
+    'CV_CUBIC': cv2.INTER_CUBIC,
+    'CV_LANCZOS4': cv2.INTER_LANCZOS4,
+    'CV_AREA': cv2.INTER_AREA,
+}
+
+def _fit_size(width, height, size):
+    """
+    Largest (width, height) that fits inside 'size' while keeping the width/height ratio.
+    'size' may be a (width, height) box or a single number for the longest side.
+    """
+    if isinstance(size, (int, float)):
+        size = (size, size)
+    scale = min(size[0] / width, size[1] / height)
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+def ResizeImage(image=None, size=None, verbose=True, interpolation='IANTIALIAS', keep_aspect_ratio=False, pool=None):
     """
-    Resize an image (PIL or cv2) to the specified size while preserving the aspect ratio.
+    Resize an image (PIL or cv2) to the specified size, optionally preserving the aspect ratio.
 
     Args:
         image (PIL.Image.Image or numpy.ndarray): The input image (PIL or cv2 format).
@@ -1004,30 +1093,16 @@ def ResizeImage(image=None, size=None, verbose=True, interpolation='IANTIALIAS')
         verbose (bool): Whether to display verbose messages. Defaults to True.
         interpolation: The interpolation method to use (shorthand or full name).
             - For PIL images, options are: NB, IBOX, IBILINEAR, IHAMMING, IBICUBIC, ILANCZOS, IANTIALIAS.
-            - For cv2 images, options are: CV_NEAREST, CV_LINEAR, CV_CUBIC, CV_LANCZOS4.
+            - For cv2 images, options are: CV_NEAREST, CV_LINEAR, CV_CUBIC, CV_LANCZOS4, CV_AREA.
+        keep_aspect_ratio (bool): Fit the image inside 'size' instead of stretching it to 'size'.
+                                  Defaults to False.
+        pool (BufferPool): Optional pool the cv2 output array is taken from (see BufferPool).
             
     Returns:
         PIL.Image.Image or numpy.ndarray: The resized image (PIL or cv2 format).
     """
-    check_required_args()
+    check_required_args(optional=('pool',))
     caller_filename, caller_line = get_caller_info()
-    
-    
-    # Define a dictionary to map shorthand names to full interpolation names
-    INTERPOLATION_MAP = {
-        'NB': Image.NEAREST,
-        'IBOX': Image.BOX,
-        'IBILINEAR': Image.BILINEAR,
-        'IHAMMING': Image.HAMMING,
-        'IBICUBIC': Image.BICUBIC,
-        'ILANCZOS': Image.LANCZOS,
-        'IANTIALIAS': Image.ANTIALIAS,
-        'CV_NEAREST': cv2.INTER_NEAREST,
-        'CV_LINEAR': cv2.INTER_LINEAR,
-        'CV_CUBIC': cv2.INTER_CUBIC,
-        'CV_LANCZOS4': cv2.INTER_LANCZOS4,
-    }
-
               
     try:
         if isinstance(image, Image.Image):  # PIL image
@@ -1035,27 +1110,34 @@ def ResizeImage(image=None, size=None, verbose=True, interpolation='IANTIALIAS')
                 msg = "Input 'size' must be a tuple of two integers (width, height)."
                 HandleError(msg, caller_filename, caller_line)
 
+            if keep_aspect_ratio:
+                size = _fit_size(image.width, image.height, size)
+
             if verbose:
                 print(f"Resizing PIL image to {size} using interpolation method: {interpolation}...")
             
-            if interpolation in INTERPOLATION_MAP:
-                interpolation = INTERPOLATION_MAP[interpolation]
+            if interpolation in RESIZE_INTERPOLATION_MAP:
+                interpolation = RESIZE_INTERPOLATION_MAP[interpolation]
 
             resized_image = image.resize(size, interpolation)
 
         elif isinstance(image, np.ndarray):  # cv2 image
+            if keep_aspect_ratio:
+                size = _fit_size(image.shape[1], image.shape[0], size)
+
             if verbose:
                 print(f"Resizing cv2 image to {size} using interpolation method: {interpolation}...")
 
-            if interpolation in INTERPOLATION_MAP:
-                interpolation = INTERPOLATION_MAP[interpolation]
+            if interpolation in RESIZE_INTERPOLATION_MAP:
+                interpolation = RESIZE_INTERPOLATION_MAP[interpolation]
 
-            if interpolation not in [cv2.INTER_NEAREST, cv2.INTER_LINEAR, cv2.INTER_CUBIC, cv2.INTER_LANCZOS4]:
+            if interpolation not in [cv2.INTER_NEAREST, cv2.INTER_LINEAR, cv2.INTER_CUBIC, cv2.INTER_LANCZOS4, cv2.INTER_AREA]:
                 msg = "Invalid interpolation method for cv2 image. Using cv2.INTER_LINEAR by default."
                 HandleError(msg, caller_filename, caller_line)
                 interpolation = cv2.INTER_LINEAR
 
-            resized_image = cv2.resize(image, size, interpolation=interpolation)
+            resized_image = _with_pooled(pool, (size[1], size[0]) + image.shape[2:], image.dtype,
+                                         cv2.resize, image, tuple(size), interpolation=interpolation)
 
         else:
             msg = "Input 'image' must be a PIL Image object or a numpy.ndarray (cv2 image)."
@@ -1069,37 +1151,232 @@ def ResizeImage(image=None, size=None, verbose=True, interpolation='IANTIALIAS')
         exit(1)
 
 
-def GaussianBlurImage(image=None, sigma=1.0, verbose=True):
+def ResizePyramid(image=None, sizes=None, keep_aspect_ratio=True, save_paths=None, workers=1, verbose=True):
     """
-    Apply Gaussian blur to an image.
+    Build several downsized versions of an image (thumbnails, multi-resolution pyramids) in one pass.
+
+    Levels are produced from largest to smallest, each one downsampled from the previous level
+    instead of from the full-resolution original, so every level only pays for its own size.
 
     Args:
-        image (PIL.Image.Image): The input image.
+        image (PIL.Image.Image or numpy.ndarray): The input image (PIL or cv2 format).
+        sizes (list): Target sizes, each a (width, height) box or a single number for the longest side.
+        keep_aspect_ratio (bool): Fit the image inside each size instead of stretching it. Defaults to True.
+        save_paths (list): Optional file paths, one per size; levels are written with SaveImage in parallel.
+        workers (int): Number of threads used to save the levels, or None for RecommendWorkers('io'). Defaults to 1.
+        verbose (bool): Whether to display verbose messages. Defaults to True.
+
+    Returns:
+        list: The resized images (PIL or cv2 format), in the same order as 'sizes'.
+
+    Example:
+        thumbnails = ResizePyramid(image, sizes=[1920, 1280, 640, 320, 128])
+    """
+    check_required_args(optional=('save_paths', 'workers'))
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        if isinstance(image, Image.Image):
+            width, height = image.size
+            resize = lambda img, size: img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        elif isinstance(image, np.ndarray):
+            height, width = image.shape[:2]
+            resize = lambda img, size: cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        else:
+            msg = "Input 'image' must be a PIL Image object or a numpy.ndarray (cv2 image)."
+            HandleError(msg, caller_filename, caller_line)
+
+        if save_paths is not None and len(save_paths) != len(sizes):
+            msg = "Inputs 'sizes' and 'save_paths' must have the same length."
+            HandleError(msg, caller_filename, caller_line)
+
+        targets = []
+        for size in sizes:
+            if keep_aspect_ratio:
+                targets.append(_fit_size(width, height, size))
+            elif isinstance(size, (int, float)):
+                targets.append((int(size), int(size)))
+            else:
+                targets.append((int(size[0]), int(size[1])))
+
+        # Walk the levels from largest to smallest, each resampled from the previous one
+        levels = [None] * len(targets)
+        previous = image
+        for index in sorted(range(len(targets)), key=lambda i: targets[i][0] * targets[i][1], reverse=True):
+            target = targets[index]
+            source = previous if (target[0] <= _image_width(previous) and target[1] <= _image_height(previous)) else image
+            levels[index] = resize(source, target)
+            previous = levels[index]
+
+        if verbose:
+            msg = f"Built {len(levels)} levels: {', '.join(f'{w}x{h}' for w, h in targets)}."
+            ShowInfo(msg, caller_filename, caller_line)
+
+        if save_paths is not None:
+            if workers is None:
+                from .abdparallel import RecommendWorkers
+                workers = RecommendWorkers('io', max_workers=len(save_paths))
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                list(executor.map(lambda level, path: SaveImage(level, path), levels, save_paths))
+
+        return levels
+
+    except Exception as e:
+        msg = f"Error building the resize pyramid: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
+
+def _image_width(image):
+    return image.size[0] if isinstance(image, Image.Image) else image.shape[1]
+
+def _image_height(image):
+    return image.size[1] if isinstance(image, Image.Image) else image.shape[0]
+
+
+# Above this sigma the 'auto' method switches to three box blurs, whose cost does not grow with sigma
+GAUSSIAN_BOX_MIN_SIGMA = 20.0
+
+GAUSSIAN_METHODS = ('auto', 'gaussian', 'box')
+
+@lru_cache(maxsize=64)
+def _gaussian_kernel(sigma, radius):
+    """
+    Normalized 1-D Gaussian kernel of 2 * radius + 1 taps (float32, cached per (sigma, radius)).
+    """
+    kernel = cv2.getGaussianKernel(2 * radius + 1, sigma, cv2.CV_32F)
+    kernel.flags.writeable = False
+    return kernel
+
+@lru_cache(maxsize=64)
+def _box_sizes(sigma, passes=3):
+    """
+    Odd box widths whose repeated application has (nearly) the variance of a Gaussian of 'sigma'.
+    """
+    ideal = np.sqrt(12.0 * sigma * sigma / passes + 1.0)
+    lower = int(np.floor(ideal))
+    if lower % 2 == 0:
+        lower -= 1
+    upper = lower + 2
+    count = int(round((12.0 * sigma * sigma - passes * lower * lower - 4 * passes * lower - 3 * passes) / (-4.0 * lower - 4.0)))
+    return tuple(lower if index < count else upper for index in range(passes))
+
+# Dtypes cv2.sepFilter2D filters natively; other integer images are filtered in floating point
+SEPFILTER_DTYPES = (np.uint8, np.uint16, np.int16, np.float32, np.float64)
+
+def _store_blurred(work, image_array, out):
+    """
+    Round, clip and cast a floating-point blur result into 'out' (allocated if None) in the input's dtype.
+    """
+    if out is None:
+        out = np.empty(image_array.shape, dtype=image_array.dtype)
+    if image_array.dtype == np.uint8:
+        cv2.convertScaleAbs(work, dst=out.reshape(work.shape))
+    elif np.issubdtype(image_array.dtype, np.integer):
+        limits = np.iinfo(image_array.dtype)
+        np.copyto(out.reshape(work.shape), np.clip(np.rint(work), limits.min, limits.max), casting='unsafe')
+    else:
+        np.copyto(out.reshape(work.shape), work, casting='unsafe')
+    return out
+
+def _gaussian_blur_array(image_array, sigma, radius=None, method='auto', out=None):
+    """
+    Gaussian blur of a single (H, W) or (H, W, C) array, keeping its dtype.
+    Borders replicate the edge pixels, like PIL's GaussianBlur.
+    """
+    if method == 'auto':
+        method = 'box' if sigma >= GAUSSIAN_BOX_MIN_SIGMA else 'gaussian'
+
+    if method == 'gaussian':
+        if radius is None:
+            # 3 sigma covers the kernel to uint8 precision, float images get 4 sigma
+            radius = int(np.ceil((3.0 if image_array.dtype == np.uint8 else 4.0) * sigma))
+        kernel = _gaussian_kernel(float(sigma), int(radius))
+        if image_array.dtype in SEPFILTER_DTYPES:
+            return cv2.sepFilter2D(image_array, -1, kernel, kernel, dst=out, borderType=cv2.BORDER_REPLICATE)
+        # int8/int32/uint32/int64 and friends: filter in float (float64 keeps 32-bit values exact)
+        work_dtype = np.float64 if image_array.dtype.itemsize >= 4 else np.float32
+        work = cv2.sepFilter2D(image_array.astype(work_dtype), -1, kernel, kernel, borderType=cv2.BORDER_REPLICATE)
+        return _store_blurred(work, image_array, out)
+
+    if method == 'box':
+        # Replicate the border once for all passes (per-pass borders would replicate already
+        # blurred edges), run the passes in float32 and round once at the end
+        sizes = _box_sizes(float(sigma))
+        pad = sum(size // 2 for size in sizes)
+        work = cv2.copyMakeBorder(image_array, pad, pad, pad, pad, cv2.BORDER_REPLICATE)
+        work = work.astype(np.float32, copy=False)
+        for size in sizes:
+            cv2.boxFilter(work, -1, (size, size), dst=work, borderType=cv2.BORDER_REPLICATE)
+        # Plain slice bounds: pad is 0 when every box is 1 wide (very small sigma)
+        height, width = image_array.shape[:2]
+        return _store_blurred(work[pad:pad + height, pad:pad + width], image_array, out)
+
+    raise ValueError(f"Unsupported method: {method}. Please use one of {', '.join(GAUSSIAN_METHODS)}.")
+
+def GaussianBlurImage(image=None, sigma=1.0, verbose=True, radius=None, method='auto', out=None, batch=None):
+    """
+    Apply Gaussian blur to an image or a batch of images.
+
+    PIL Images are blurred by Pillow. NumPy arrays (any integer or float dtype) are blurred with a separable
+    OpenCV filter whose 1-D kernel is cached per (sigma, radius). For very large sigmas, 'auto'
+    approximates the Gaussian with three box blurs, which cost the same for any sigma.
+
+    Args:
+        image (PIL.Image.Image, numpy.ndarray or list): The input image, an (N, H, W[, C]) batch,
+                                                        or a list of images.
         sigma (float): The standard deviation of the Gaussian kernel.
         verbose (bool): Whether to display verbose messages. Defaults to True.
+        radius (int): Kernel radius for arrays with method 'gaussian'. Defaults to 3 * sigma
+                      (4 * sigma for float images).
+        method (str): 'auto', 'gaussian' (exact separable kernel) or 'box' (three box blurs).
+                      Defaults to 'auto', which uses 'box' from sigma 20 up.
+        out (numpy.ndarray): Optional array of the input's shape and dtype to write an array result into.
+        batch (bool): Whether the first axis of an array indexes images. Defaults to None, which treats
+                      4-D arrays as (N, H, W, C) batches and 2-D/3-D arrays as single images; pass True
+                      for an (N, H, W) batch of grayscale images.
 
     Returns:
-        PIL.Image.Image: The blurred image.
+        PIL.Image.Image, numpy.ndarray or list: The blurred image(s), of the same type as the input.
     """
     
-    check_required_args()
+    check_required_args(optional=('radius', 'out', 'batch'))
     caller_filename, caller_line=get_caller_info()
           
     try:
-        if not isinstance(image, Image.Image):
-            msg="Input 'image' must be a PIL Image object."
-        
         if not isinstance(sigma, (int, float)) or sigma <= 0:
             msg="Input 'sigma' must be a positive number."
             HandleError(msg,caller_filename, caller_line)
+
+        if method not in GAUSSIAN_METHODS:
+            msg=f"Unsupported method: {method}. Please use one of {', '.join(GAUSSIAN_METHODS)}."
+            HandleError(msg,caller_filename, caller_line)
         
         if verbose:
             msg=(f"Applying Gaussian blur with sigma={sigma}...")
             ShowInfo(msg,caller_filename, caller_line)
 
-        
-        blurred_image = image.filter(ImageFilter.GaussianBlur(sigma))
-        return blurred_image
+        if isinstance(image, Image.Image):
+            return image.filter(ImageFilter.GaussianBlur(sigma))
+
+        if isinstance(image, np.ndarray):
+            if batch is None:
+                batch = image.ndim == 4
+            if batch:
+                if image.ndim not in (3, 4):
+                    msg="A batch must be an (N, H, W) or (N, H, W, C) array."
+                    HandleError(msg,caller_filename, caller_line)
+                if out is None:
+                    out = np.empty_like(image)
+                for index in range(len(image)):
+                    _gaussian_blur_array(image[index], sigma, radius, method, out=out[index])
+                return out
+            return _gaussian_blur_array(image, sigma, radius, method, out=out)
+
+        if isinstance(image, (list, tuple)):
+            return [GaussianBlurImage(item, sigma, False, radius, method) for item in image]
+
+        msg="Input 'image' must be a PIL Image, a numpy.ndarray (cv2 image) or a list of images."
+        HandleError(msg,caller_filename, caller_line)
     except Exception as e:
         msg=f"{e}"
         HandleError(msg,caller_filename, caller_line)
@@ -1175,26 +1452,205 @@ def SharpenImage(image=None, factor=2.0, verbose=True):
         HandleError(msg,caller_filename, caller_line)          
         
 
-def DetectEdgesInImage(image=None, method='canny', threshold1=100, threshold2=200, verbose=True):
+EDGE_METHODS = ('canny', 'sobel', 'laplacian', 'prewitt', 'scharr')
+
+PREWITT_KERNEL_X = np.array([[-1, 0, 1], [-1, 0, 1], [-1, 0, 1]], dtype=np.float32)
+PREWITT_KERNEL_Y = np.ascontiguousarray(PREWITT_KERNEL_X.T)
+
+# Per-thread scratch buffers for the edge engine, keyed by (height, width). Only frames up to
+# EDGE_SCRATCH_MAX_PIXELS are kept between calls (13 bytes per pixel), larger ones get buffers
+# that are freed on return, unless the caller keeps them in a workspace= dict (4K video loops);
+# DetectEdgesBatch keeps its own for the whole batch.
+EDGE_SCRATCH_MAX_PIXELS = 1920 * 1080
+_edge_workspace = threading.local()
+
+def _make_edge_buffers(height, width):
+    return (np.empty((height, width), dtype=np.float32),
+            np.empty((height, width), dtype=np.float32),
+            np.empty((height, width), dtype=np.float32),
+            np.empty((height, width), dtype=np.uint8))
+
+def _get_edge_buffers(height, width, workspace=None):
+    if workspace is not None:
+        # Caller-owned: kept for any size, freed with the dict
+        buffers = workspace.get('edge_buffers')
+        if buffers is None or buffers[0].shape != (height, width):
+            buffers = workspace['edge_buffers'] = _make_edge_buffers(height, width)
+        return buffers
+    if height * width > EDGE_SCRATCH_MAX_PIXELS:
+        return _make_edge_buffers(height, width)
+    buffers = getattr(_edge_workspace, 'buffers', None)
+    if buffers is None or buffers[0].shape != (height, width):
+        buffers = _edge_workspace.buffers = _make_edge_buffers(height, width)
+    return buffers
+
+def _edge_gray(image_array, gray):
+    # Reduce to one channel; the uint8 result is written into the scratch buffer
+    if image_array.ndim == 3:
+        channels = image_array.shape[2]
+        if channels == 1:
+            image_array = image_array[..., 0]
+        elif channels in (3, 4):
+            code = cv2.COLOR_RGB2GRAY if channels == 3 else cv2.COLOR_RGBA2GRAY
+            if image_array.dtype == np.uint8:
+                return cv2.cvtColor(image_array, code, dst=gray)
+            if image_array.dtype == np.float64:
+                image_array = image_array.astype(np.float32)
+            image_array = cv2.cvtColor(image_array, code)
+        else:
+            raise ValueError(f"Unsupported number of channels for edge detection: {channels}.")
+    return image_array
+
+def _detect_edges_array(image_array, method='canny', threshold1=100, threshold2=200, out=None, buffers=None,
+                        workspace=None):
+    """
+    Detect edges in a NumPy image (grayscale, RGB or RGBA) without allocating intermediates.
+
+    Gradients are computed in float32 into per-thread scratch buffers that are reused across
+    calls of the same size, and gradient norms use cv2.magnitude. Non-uint8 images are taken
+    to be in the 0..255 range: float64 is computed in float32, and Canny (which only accepts
+    uint8) gets the image saturated to uint8. The result is written to 'out' when given: a
+    uint8 'out' receives the saturated edge map, a float32 'out' receives the raw magnitude.
+    Shared by DetectEdges, DetectEdgesInImage and the ImageOps chain.
+    """
+    if method not in EDGE_METHODS:
+        raise ValueError(f"Unsupported edge detection method: {method}. Please use 'canny', 'sobel', 'laplacian', 'prewitt', or 'scharr'.")
+
+    height, width = image_array.shape[:2]
+    if buffers is None:
+        buffers = _get_edge_buffers(height, width, workspace)
+    gradient_x, gradient_y, magnitude, gray = buffers
+
+    if out is None:
+        out = np.empty((height, width), dtype=np.uint8)
+    elif out.shape != (height, width) or out.dtype not in (np.uint8, np.float32):
+        raise ValueError(f"Output buffer must be a uint8 or float32 array of shape {(height, width)}.")
+
+    # Convert the image to grayscale if it's not already
+    image_array = _edge_gray(image_array, gray)
+    if method == 'canny' and image_array.dtype != np.uint8:
+        image_array = cv2.convertScaleAbs(image_array)
+    elif image_array.dtype == np.float64:
+        image_array = image_array.astype(np.float32)
+
+    if method == 'canny':
+        if out.dtype == np.uint8:
+            return cv2.Canny(image_array, threshold1, threshold2, edges=out)
+        out[...] = cv2.Canny(image_array, threshold1, threshold2)
+        return out
+
+    if method == 'laplacian':
+        cv2.Laplacian(image_array, cv2.CV_32F, dst=magnitude)
+        if out.dtype == np.float32:
+            return np.abs(magnitude, out=out)
+    else:
+        if method == 'sobel':
+            cv2.Sobel(image_array, cv2.CV_32F, 1, 0, dst=gradient_x)
+            cv2.Sobel(image_array, cv2.CV_32F, 0, 1, dst=gradient_y)
+        elif method == 'prewitt':
+            cv2.filter2D(image_array, cv2.CV_32F, PREWITT_KERNEL_X, dst=gradient_x)
+            cv2.filter2D(image_array, cv2.CV_32F, PREWITT_KERNEL_Y, dst=gradient_y)
+        elif method == 'scharr':
+            cv2.Scharr(image_array, cv2.CV_32F, 1, 0, dst=gradient_x)
+            cv2.Scharr(image_array, cv2.CV_32F, 0, 1, dst=gradient_y)
+        if out.dtype == np.float32:
+            return cv2.magnitude(gradient_x, gradient_y, magnitude=out)
+        cv2.magnitude(gradient_x, gradient_y, magnitude=magnitude)
+
+    # Saturate to 0..255 instead of wrapping around
+    return cv2.convertScaleAbs(magnitude, dst=out)
+
+def DetectEdges(image=None, method='sobel', threshold1=100, threshold2=200, out=None, workspace=None):
+    """
+    Detect edges in a NumPy image using the float32 edge engine.
+
+    Args:
+        image (numpy.ndarray): The input image, (H, W), (H, W, 3) RGB or (H, W, 4) RGBA; uint8, or
+                               float/uint16 in the 0..255 range.
+        method (str): The edge detection method ('canny', 'sobel', 'laplacian', 'prewitt', or 'scharr').
+        threshold1 (int): The first threshold for the hysteresis procedure (only for 'canny' method).
+        threshold2 (int): The second threshold for the hysteresis procedure (only for 'canny' method).
+        out (numpy.ndarray): Optional (H, W) buffer to write into. uint8 receives the saturated
+                             edge map, float32 receives the raw gradient magnitude.
+        workspace (dict): Optional dict that keeps the scratch buffers between calls. Frames above
+                          EDGE_SCRATCH_MAX_PIXELS (1080p) otherwise get fresh ones on every call.
+
+    Returns:
+        numpy.ndarray: The edge map ('out' if given).
+    """
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        if not isinstance(image, np.ndarray):
+            msg = "Input 'image' must be a numpy array (cv2 image)."
+            HandleError(msg, caller_filename, caller_line)
+
+        return _detect_edges_array(image, method, threshold1, threshold2, out, workspace=workspace)
+
+    except Exception as e:
+        msg = f"Error detecting edges: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
+
+def DetectEdgesBatch(images=None, method='sobel', threshold1=100, threshold2=200, out=None, workspace=None):
+    """
+    Detect edges in a batch of images, reusing the same scratch buffers for every frame.
+
+    Args:
+        images (numpy.ndarray or list): An (N, H, W) / (N, H, W, 3|4) array or a list of same-size arrays.
+        method (str): The edge detection method ('canny', 'sobel', 'laplacian', 'prewitt', or 'scharr').
+        threshold1 (int): The first threshold for the hysteresis procedure (only for 'canny' method).
+        threshold2 (int): The second threshold for the hysteresis procedure (only for 'canny' method).
+        out (numpy.ndarray): Optional (N, H, W) uint8 or float32 buffer to write into.
+        workspace (dict): Optional dict that keeps the scratch buffers between batches.
+
+    Returns:
+        numpy.ndarray: The (N, H, W) edge maps ('out' if given).
+    """
+    caller_filename, caller_line = get_caller_info()
+
+    try:
+        if len(images) == 0:
+            return np.empty((0, 0, 0), dtype=np.uint8) if out is None else out
+
+        height, width = images[0].shape[:2]
+        if out is None:
+            out = np.empty((len(images), height, width), dtype=np.uint8)
+        elif out.shape != (len(images), height, width):
+            msg = f"Output buffer must have shape {(len(images), height, width)}."
+            HandleError(msg, caller_filename, caller_line)
+
+        buffers = _make_edge_buffers(height, width) if workspace is None else _get_edge_buffers(height, width, workspace)
+        for i, image in enumerate(images):
+            _detect_edges_array(image, method, threshold1, threshold2, out[i], buffers)
+        return out
+
+    except Exception as e:
+        msg = f"Error detecting edges: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
+
+def DetectEdgesInImage(image=None, method='canny', threshold1=100, threshold2=200, verbose=True, workspace=None):
     """
     Detect edges in an image using various edge detection methods.
 
     Args:
-        image (PIL.Image.Image): The input image.
+        image (PIL.Image.Image or numpy.ndarray): The input image.
         method (str): The edge detection method to use ('canny', 'sobel', 'laplacian', 'prewitt', or 'scharr').
         threshold1 (int): The first threshold for the hysteresis procedure (only for 'canny' method).
         threshold2 (int): The second threshold for the hysteresis procedure (only for 'canny' method).
         verbose (bool): Whether to display verbose messages. Defaults to True.
+        workspace (dict): Optional dict that keeps the scratch buffers between calls (see DetectEdges).
 
     Returns:
-        PIL.Image.Image: The edge-detected image.
+        PIL.Image.Image or numpy.ndarray: The edge-detected image, in the same type as the input.
     """
-    check_required_args()
+    check_required_args(optional=('workspace',))
     caller_filename, caller_line=get_caller_info()
         
     try:
-        if not isinstance(image, Image.Image):
-            msg = "Input 'image' must be a PIL Image object."
+        if not isinstance(image, (Image.Image, np.ndarray)):
+            msg = "Input 'image' must be a PIL Image object or a numpy array."
             HandleError(msg, caller_filename, caller_line)
 
         if method == 'canny':
@@ -1205,68 +1661,124 @@ def DetectEdgesInImage(image=None, method='canny', threshold1=100, threshold2=20
             if verbose:
                 print(f"Detecting edges in image using Canny edge detection (threshold1={threshold1}, threshold2={threshold2})...")
 
-            # Convert the input image to grayscale
-            image = image.convert('L')
-            image_array = np.array(image)
-            edges = cv2.Canny(image_array, threshold1, threshold2)
-            edge_image = Image.fromarray(edges)
-            return edge_image
-
-        elif method == 'sobel' or method == 'laplacian' or method == 'prewitt' or method == 'scharr':
+        elif method in EDGE_METHODS:
             if verbose:
                 print(f"Detecting edges in image using {method.capitalize()} edge detection...")
-            
-            # Convert the input image to a NumPy array
-            image_array = np.array(image)
-
-            # Convert the image to grayscale if it's not already
-            if len(image_array.shape) == 3 and image_array.shape[2] == 3:
-                image_array = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
-
-            if method == 'sobel':
-                edges = cv2.Sobel(image_array, cv2.CV_64F, 1, 1)
-            elif method == 'laplacian':
-                edges = cv2.Laplacian(image_array, cv2.CV_64F)
-            elif method == 'prewitt':
-                kernel_x = np.array([[-1, 0, 1], [-1, 0, 1], [-1, 0, 1]])
-                kernel_y = np.array([[-1, -1, -1], [0, 0, 0], [1, 1, 1]])
-                gradient_x = cv2.filter2D(image_array, -1, kernel_x)
-                gradient_y = cv2.filter2D(image_array, -1, kernel_y)
-                edges = np.sqrt(gradient_x**2 + gradient_y**2)
-            elif method == 'scharr':
-                gradient_x = cv2.Scharr(image_array, cv2.CV_64F, 1, 0)
-                gradient_y = cv2.Scharr(image_array, cv2.CV_64F, 0, 1)
-                edges = np.sqrt(gradient_x**2 + gradient_y**2)
-
-            edge_image = Image.fromarray(edges.astype('uint8'))
-            return edge_image
 
         else:
             msg = f"Unsupported edge detection method: {method}. Please use 'canny', 'sobel', 'laplacian', 'prewitt', or 'scharr'."
             HandleError(msg, caller_filename, caller_line)
 
+        if isinstance(image, np.ndarray):
+            return _detect_edges_array(image, method, threshold1, threshold2, workspace=workspace)
+
+        # Convert the input image to grayscale
+        image_array = np.asarray(image.convert('L'))
+        edges = _detect_edges_array(image_array, method, threshold1, threshold2, workspace=workspace)
+        return Image.fromarray(edges)
+
     except Exception as e:
         msg = f"{e}"
         HandleError(msg, caller_filename, caller_line)
 
-def ConvolveImage(image=None, kernel=None, verbose=True):
+# Boundary names accepted by ConvolveImage ('wrap', 'fill' and 'symm' follow scipy.signal.convolve2d)
+CONVOLVE_BOUNDARY_MAP = {
+    'wrap': cv2.BORDER_WRAP,
+    'fill': cv2.BORDER_CONSTANT,
+    'symm': cv2.BORDER_REFLECT,
+    'reflect': cv2.BORDER_REFLECT_101,
+    'replicate': cv2.BORDER_REPLICATE,
+}
+
+# Kernels with more taps than this go through the FFT path when method='auto'
+CONVOLVE_FFT_MIN_TAPS = 15 * 15
+
+def _separate_kernel(kernel, tolerance=1e-6):
+    """
+    Split a rank-1 kernel into (column, row) 1-D factors, or return None if it is not separable.
+    """
+    u, s, vt = np.linalg.svd(kernel)
+    if s[0] == 0 or (len(s) > 1 and s[1] > tolerance * s[0]):
+        return None
+    scale = np.sqrt(s[0])
+    return (u[:, 0] * scale).astype(np.float32), (vt[0] * scale).astype(np.float32)
+
+def _convolve_array(image_array, kernel, boundary='wrap', method='auto'):
+    """
+    Convolve a (H, W) or (H, W, C) array with a 2-D kernel and return float32.
+
+    Matches scipy.signal.convolve2d(..., mode='same') for every backend. The image is padded
+    once according to 'boundary' and then filtered with OpenCV ('direct'), two 1-D passes
+    ('separable', rank-1 kernels only) or FFT ('fft').
+    """
+    if boundary not in CONVOLVE_BOUNDARY_MAP:
+        raise ValueError(f"Unsupported boundary: {boundary}. Please use {', '.join(repr(b) for b in CONVOLVE_BOUNDARY_MAP)}.")
+
+    kernel = np.asarray(kernel, dtype=np.float32)
+    kernel_h, kernel_w = kernel.shape
+
+    if method == 'auto':
+        if kernel.size > 1 and _separate_kernel(kernel) is not None:
+            method = 'separable'
+        elif kernel.size >= CONVOLVE_FFT_MIN_TAPS:
+            method = 'fft'
+        else:
+            method = 'direct'
+
+    # Pad so that a 'valid' correlation with the flipped kernel equals convolve2d's 'same' output
+    top, left = kernel_h // 2, kernel_w // 2
+    padded = cv2.copyMakeBorder(image_array.astype(np.float32, copy=False),
+                                top, kernel_h - 1 - top, left, kernel_w - 1 - left,
+                                CONVOLVE_BOUNDARY_MAP[boundary], value=0)
+    if image_array.ndim == 3 and padded.ndim == 2:
+        padded = padded[..., np.newaxis]
+    height, width = image_array.shape[:2]
+
+    if method == 'fft':
+        fft_kernel = kernel if padded.ndim == 2 else kernel[..., np.newaxis]
+        return fftconvolve(padded, fft_kernel, mode='valid', axes=(0, 1)).astype(np.float32, copy=False)
+
+    flipped = kernel[::-1, ::-1]
+    if method == 'separable':
+        factors = _separate_kernel(flipped)
+        if factors is None:
+            raise ValueError("The 'separable' method requires a rank-1 kernel.")
+        column, row = factors
+        result = cv2.sepFilter2D(padded, cv2.CV_32F, row, column, anchor=(0, 0), borderType=cv2.BORDER_CONSTANT)
+    elif method == 'direct':
+        result = cv2.filter2D(padded, cv2.CV_32F, flipped, anchor=(0, 0), borderType=cv2.BORDER_CONSTANT)
+    else:
+        raise ValueError(f"Unsupported method: {method}. Please use 'auto', 'direct', 'separable', or 'fft'.")
+
+    result = result[:height, :width]
+    if image_array.ndim == 3 and result.ndim == 2:
+        result = result[..., np.newaxis]
+    return result
+
+def ConvolveImage(image=None, kernel=None, verbose=True, boundary='wrap', method='auto'):
     """
     Apply convolution to an image with a given kernel.
 
     Args:
-        image (PIL.Image.Image): The input image.
+        image (PIL.Image.Image or numpy.ndarray): The input image (grayscale or multi-channel).
         kernel (numpy.ndarray): The convolution kernel.
         verbose (bool): Whether to display verbose messages. Defaults to True.
+        boundary (str): How the image is extended past its edges ('wrap', 'fill', 'symm',
+                        'reflect', or 'replicate'). Defaults to 'wrap'.
+        method (str): The convolution backend ('auto', 'direct', 'separable', or 'fft').
+                      'auto' uses two 1-D passes for rank-1 kernels, FFT for large kernels
+                      and cv2.filter2D otherwise.
 
     Returns:
-        PIL.Image.Image: The convolved image.
+        PIL.Image.Image or numpy.ndarray: The convolved image. Single-channel PIL images come back
+        as mode 'F', multi-channel PIL images are saturated to uint8, and arrays come back as float32.
     """
     check_required_args()
     caller_filename, caller_line=get_caller_info()
            
     try:
-        if not isinstance(image, Image.Image):
-            msg="Input 'image' must be a PIL Image object."
+        if not isinstance(image, (Image.Image, np.ndarray)):
+            msg="Input 'image' must be a PIL Image object or a numpy array."
             HandleError(msg,caller_filename, caller_line)
         
         if not isinstance(kernel, np.ndarray) or len(kernel.shape) != 2:
@@ -1276,9 +1788,12 @@ def ConvolveImage(image=None, kernel=None, verbose=True):
         if verbose:
             print("Applying convolution to image...")
         
-        image_array = np.array(image)
-        convolved_image = convolve2d(image_array, kernel, mode='same', boundary='wrap')
-        convolved_image = Image.fromarray(convolved_image)
+        convolved_image = _convolve_array(np.asarray(image), kernel, boundary, method)
+
+        if isinstance(image, Image.Image):
+            if convolved_image.ndim == 2:
+                return Image.fromarray(convolved_image)
+            return Image.fromarray(np.clip(convolved_image, 0, 255).astype(np.uint8))
         return convolved_image
     except Exception as e:
         msg=f"{e}"
@@ -1287,28 +1802,35 @@ def ConvolveImage(image=None, kernel=None, verbose=True):
 
 
 
-def ApplyFilter(image=None, kernel=None):
+def ApplyFilter(image=None, kernel=None, pool=None):
     """
     Apply a convolution filter to an image using a custom kernel.
 
     Args:
         image (PIL.Image.Image or numpy.ndarray): The input image to apply the filter to.
         kernel (numpy.ndarray): The custom convolution kernel.
+        pool (BufferPool): Optional pool the output array of color images is taken from (see BufferPool).
+                           Grayscale results are returned as PIL Images that share their array,
+                           so they are never pooled.
 
     Returns:
         PIL.Image.Image or numpy.ndarray: The filtered image.
     """
-    check_required_args()
+    check_required_args(optional=('pool',))
     caller_filename, caller_line=get_caller_info()
              
     try:
         if isinstance(image, Image.Image):
-            # If the input image is a PIL Image, convert it to a numpy array
-            image = np.array(image)
+            # If the input image is a PIL Image, view it as a numpy array (filter2D never writes to it)
+            image = np.asarray(image)
 
         if isinstance(image, np.ndarray):
             # If the input image is a numpy array (cv2 image)
-            filtered_image = cv2.filter2D(image, -1, kernel)
+            # Grayscale results are handed to PIL, which may share the array, so only color ones are pooled
+            if image.ndim == 3:
+                filtered_image = _with_pooled(pool, image.shape, image.dtype, cv2.filter2D, image, -1, kernel)
+            else:
+                filtered_image = cv2.filter2D(image, -1, kernel)
 
             if len(filtered_image.shape) == 2:
                 # Convert grayscale image back to PIL Image
@@ -1359,12 +1881,120 @@ def ShowImage(image=None, title="Image", verbose=True):
         
         exit(1)
 
-def CV2PIL(cv2_image=None):
+# Channel order of each raw mode packed by _pil_to_array, for the NumPy fallback
+PIL_RAWMODE_CHANNELS = {'L': None, 'RGB': None, 'RGBA': None, 'BGR': [2, 1, 0], 'BGRA': [2, 1, 0, 3]}
+
+def SwapRB(image=None, copy=False):
+    """
+    Swap the red and blue channels of an array (BGR <-> RGB, BGRA <-> RGBA).
+
+    Args:
+        image (numpy.ndarray): An (H, W, 3) or (H, W, 4) array.
+        copy (bool): If False (default), 3-channel input comes back as a reversed-channel view that
+                     shares memory with 'image'. The view has a negative channel stride, which
+                     cv2 drawing functions (cv2.rectangle, cv2.putText, ...) and writers reject;
+                     pass copy=True for those. If True, the result is a contiguous, writable copy.
+                     4-channel input is always copied.
+
+    Returns:
+        numpy.ndarray: The channel-swapped array.
+    """
+    if not isinstance(image, np.ndarray) or image.ndim != 3 or image.shape[2] not in (3, 4):
+        raise ValueError("SwapRB expects an (H, W, 3) or (H, W, 4) numpy array.")
+    if image.shape[2] == 4:
+        return image[..., [2, 1, 0, 3]]
+    swapped = image[..., ::-1]
+    return np.ascontiguousarray(swapped) if copy else swapped
+
+def AsArray(image=None, copy=False):
+    """
+    Get a numpy array for a PIL Image or numpy array with as few copies as possible.
+
+    Args:
+        image (PIL.Image.Image or numpy.ndarray): The input image.
+        copy (bool): If False (default), arrays are returned as they are. If True, the result never
+                     shares memory with 'image'. L/RGB/RGBA PIL Images are always packed into a new
+                     writable array with a single copy.
+
+    Returns:
+        numpy.ndarray: The image as an array.
+    """
+    if isinstance(image, np.ndarray):
+        return image.copy() if copy else image
+    if isinstance(image, Image.Image):
+        if image.mode in ('L', 'RGB', 'RGBA'):
+            # Always a fresh array, packed by PIL in a single copy
+            array = _pil_to_array(image, image.mode, len(image.mode))
+            return array.reshape(image.height, image.width) if image.mode == 'L' else array
+        array = np.asarray(image)
+        return array.copy() if copy else array
+    raise TypeError("Unsupported image type. Please provide a PIL Image or numpy array (cv2 image).")
+
+def AsPIL(image=None, copy=False):
+    """
+    Get a PIL Image for a numpy array or PIL Image with as few copies as possible.
+
+    Args:
+        image (numpy.ndarray or PIL.Image.Image): The input image (grayscale, RGB or RGBA order).
+        copy (bool): If False (default), contiguous uint8 grayscale and RGBA arrays are wrapped
+                     without copying (the read-only PIL Image shares memory with the array).
+                     PIL cannot share memory with 3-channel arrays, so those are always copied once.
+
+    Returns:
+        PIL.Image.Image: The image as a PIL Image.
+    """
+    if isinstance(image, Image.Image):
+        return image.copy() if copy else image
+    if not isinstance(image, np.ndarray):
+        raise TypeError("Unsupported image type. Please provide a PIL Image or numpy array (cv2 image).")
+    if not copy and image.dtype == np.uint8 and image.flags['C_CONTIGUOUS']:
+        height, width = image.shape[:2]
+        if image.ndim == 2:
+            return Image.frombuffer('L', (width, height), image, 'raw', 'L', 0, 1)
+        if image.shape[2] == 4:
+            return Image.frombuffer('RGBA', (width, height), image, 'raw', 'RGBA', 0, 1)
+    return Image.fromarray(image)
+
+def _pil_to_array(image, rawmode, channels):
+    """
+    Pack a PIL Image into a newly allocated (H, W, channels) uint8 array in the given raw mode.
+
+    Does what Image.tobytes does, but streams the encoder's chunks straight into the array
+    instead of joining them into an intermediate bytes object, so the pixels are copied once.
+    Falls back to np.asarray (one more copy) if this Pillow lacks the encoder internals.
+    """
+    image.load()
+    if not hasattr(Image, '_getencoder') or getattr(image, 'im', None) is None:
+        order = PIL_RAWMODE_CHANNELS[rawmode]
+        array = np.array(image) if order is None else np.asarray(image)[..., order]
+        return array.reshape(image.height, image.width, channels)
+    array = np.empty((image.height, image.width, channels), dtype=np.uint8)
+    flat = array.reshape(-1)
+    encoder = Image._getencoder(image.mode, 'raw', (rawmode, 0, 1))
+    encoder.setimage(image.im, (0, 0) + image.size)
+    buffer_size = max(65536, image.width * 4)
+    offset = 0
+    while True:
+        _, error_code, data = encoder.encode(buffer_size)
+        flat[offset:offset + len(data)] = np.frombuffer(data, dtype=np.uint8)
+        offset += len(data)
+        if error_code:
+            break
+    if error_code < 0:
+        raise RuntimeError(f"Encoder error {error_code} while packing the image.")
+    return array
+
+def CV2PIL(cv2_image=None, copy=True):
     """
     Convert an OpenCV image (BGR format) to a PIL Image (RGB format).
 
+    The channel swap happens while PIL unpacks the buffer, so color images are copied exactly once.
+    4-channel (BGRA) images become RGB images; the alpha channel is dropped.
+
     Args:
         cv2_image (numpy.ndarray): The OpenCV image.
+        copy (bool): If False, contiguous grayscale images are wrapped without copying (the PIL Image
+                     shares memory with the array). Defaults to True.
 
     Returns:
         PIL.Image.Image or None: The PIL Image if conversion is successful, None otherwise.
@@ -1375,18 +2005,33 @@ def CV2PIL(cv2_image=None):
     try:
         if cv2_image is None:
             return None
+        if cv2_image.ndim == 2 or (cv2_image.ndim == 3 and cv2_image.shape[2] == 1):
+            return AsPIL(cv2_image.reshape(cv2_image.shape[:2]), copy=copy)
+
+        height, width, channels = cv2_image.shape
+        if channels in (3, 4) and cv2_image.dtype == np.uint8:
+            # 'BGRX' unpacks BGRA into RGB, skipping alpha like cv2.COLOR_BGR2RGB does
+            rawmode = 'BGR' if channels == 3 else 'BGRX'
+            return Image.frombuffer('RGB', (width, height), np.ascontiguousarray(cv2_image), 'raw', rawmode, 0, 1)
         return Image.fromarray(cv2.cvtColor(cv2_image, cv2.COLOR_BGR2RGB))
     except Exception as e:
         msg = f"Error converting from OpenCV to PIL: {str(e)}"
         HandleError(msg, caller_filename, caller_line)
         return None
 
-def PIL2CV2(pil_image=None):
+def PIL2CV2(pil_image=None, copy=True):
     """
     Convert a PIL Image (RGB format) to an OpenCV image (BGR format).
 
+    PIL packs the pixels directly in BGR order into the new array, so they are copied once
+    (no intermediate np.array and cv2.cvtColor copies). RGBA images become 3-channel BGR
+    images (the alpha channel is dropped), and L/I/F images a 2-D array.
+
     Args:
         pil_image (PIL.Image.Image): The PIL Image.
+        copy (bool): If False, I and F images are returned as a read-only array without the extra
+                     copy that makes it writable. L, RGB and RGBA images are always packed into a new
+                     array with a single copy. Defaults to True.
 
     Returns:
         numpy.ndarray or None: The OpenCV image if conversion is successful, None otherwise.
@@ -1401,38 +2046,70 @@ def PIL2CV2(pil_image=None):
     try:
         if pil_image is None:
             return None
-        return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+        if pil_image.mode in ('L', 'I', 'F'):
+            return AsArray(pil_image, copy=copy)
+        if pil_image.mode not in ('RGB', 'RGBA'):
+            pil_image = pil_image.convert('RGB')
+
+        # PIL packs the pixels straight into the array in BGR order: one copy, no cvtColor
+        return _pil_to_array(pil_image, 'BGR', 3)
     except Exception as e:
         msg = f"Error converting from PIL to OpenCV: {str(e)}"
         HandleError(msg, caller_filename, caller_line)
         return None
     
     
-def copy_brighter_pixels(np_img1, np_img2):
+# Luminosity weights (ITU-R BT.601) used to compare pixel brightness
+LUMINANCE_WEIGHTS = (np.float32(0.2989), np.float32(0.5870), np.float32(0.1140))
+
+def _luminance(np_img):
+    """
+    Float32 brightness of an (H, W, 3) image using the luminosity method, without
+    materialising a float64 copy of the whole image.
+    """
+    w_r, w_g, w_b = LUMINANCE_WEIGHTS
+    brightness = np.multiply(np_img[..., 0], w_r, dtype=np.float32)
+    channel = np.multiply(np_img[..., 1], w_g, dtype=np.float32)
+    brightness += channel
+    np.multiply(np_img[..., 2], w_b, out=channel, dtype=np.float32)
+    brightness += channel
+    return brightness
+
+def copy_brighter_pixels(np_img1, np_img2, out=None):
     """
     Takes two numpy arrays representing images, compares their pixel brightness, 
     and copies the brighter pixels from image 2 to image 1.
     
     :param np_img1: Numpy array of the first image (destination)
     :param np_img2: Numpy array of the second image (source)
-    :return: Numpy array of the modified first image
+    :param out: Optional array to write the result into; defaults to np_img1 (in place)
+    :return: Numpy array of the modified first image (or out)
     """
-    # Calculate the brightness of each pixel using the luminosity method
-    brightness_img1 = np_img1[..., 0]*0.2989 + np_img1[..., 1]*0.5870 + np_img1[..., 2]*0.1140
-    brightness_img2 = np_img2[..., 0]*0.2989 + np_img2[..., 1]*0.5870 + np_img2[..., 2]*0.1140
-
     # Create a mask where the brightness of img2 is greater than img1
-    mask = brightness_img2 > brightness_img1
+    mask = _luminance(np_img2) > _luminance(np_img1)
 
-    # Copy brighter pixels from np_img2 to np_img1
-    np_img1[mask] = np_img2[mask]
+    if out is None:
+        out = np_img1
+    elif out is not np_img1:
+        np.copyto(out, np_img1)
 
-    return np_img1
+    # Copy brighter pixels from np_img2
+    np.copyto(out, np_img2, where=mask[..., np.newaxis])
 
-import numpy as np
-from PIL import Image
+    return out
+
+def copy_brighter_pixels_percentage(np_img1, np_img2, percentage=50, seed=None, out=None):
+    """
+    Copies a random percentage of the pixels of image 2 that are brighter than image 1
+    into image 1.
 
-def copy_brighter_pixels_percentage(np_img1, np_img2, percentage=50):
+    :param np_img1: Numpy array of the first image (destination)
+    :param np_img2: Numpy array of the second image (source)
+    :param percentage: Percentage of the brighter pixels to copy over
+    :param seed: Seed (int) or numpy.random.Generator used to pick the pixels
+    :param out: Optional array to write the result into; defaults to np_img1 (in place)
+    :return: Numpy array of the modified first image (or out)
+    """
     # Check if images have three dimensions (height, width, channels)
     if np_img1.ndim != 3 or np_img2.ndim != 3:
         raise ValueError("Both images must have three dimensions [height, width, channels]")
@@ -1441,55 +2118,216 @@ def copy_brighter_pixels_percentage(np_img1, np_img2, percentage=50):
     if np_img1.shape != np_img2.shape:
         raise ValueError("Both images must have the same shape")
     
-    # Calculate the brightness of each pixel using the luminosity method
-    brightness_img1 = np.sum(np_img1 * [0.2989, 0.5870, 0.1140], axis=2)
-    brightness_img2 = np.sum(np_img2 * [0.2989, 0.5870, 0.1140], axis=2)
-
     # Create a mask where the brightness of img2 is greater than img1
-    mask = brightness_img2 > brightness_img1
-
-    # Get the indices of the mask where the condition is True
-    brighter_indices = np.argwhere(mask)
+    mask = _luminance(np_img2) > _luminance(np_img1)
 
-    # Determine the number of pixels to copy over
+    # Flat indices of the brighter pixels and how many of them to copy over
+    brighter_indices = np.flatnonzero(mask)
     num_pixels_to_copy = int(len(brighter_indices) * (percentage / 100.0))
 
     # Select a random subset of these indices
-    selected_indices = np.random.choice(len(brighter_indices), size=num_pixels_to_copy, replace=False)
+    rng = np.random.default_rng(seed)
+    selected_indices = rng.choice(brighter_indices, size=num_pixels_to_copy, replace=False, shuffle=False)
 
-    # Copy the selected brighter pixels from np_img2 to np_img1
-    for idx in selected_indices:
-        np_img1[tuple(brighter_indices[idx])] = np_img2[tuple(brighter_indices[idx])]
+    # Turn the selection back into a (sub-sampled) mask
+    selected_mask = np.zeros(mask.size, dtype=bool)
+    selected_mask[selected_indices] = True
 
-    return np_img1
+    if out is None:
+        out = np_img1
+    elif out is not np_img1:
+        np.copyto(out, np_img1)
 
+    # Copy the selected brighter pixels from np_img2 in one masked copy
+    np.copyto(out, np_img2, where=selected_mask.reshape(mask.shape)[..., np.newaxis])
 
-def create_brighter_image(np_img1, np_img2):
+    return out
+
+
+def create_brighter_image(np_img1, np_img2, out=None):
     """
     Takes two numpy arrays representing images, compares them pixel by pixel across
     all channels, and creates a new image array with the brighter pixels from each image.
     
     :param np_img1: Numpy array of the first image
     :param np_img2: Numpy array of the second image
+    :param out: Optional uint8 array to write the result into (may be np_img1 or np_img2)
     :return: Numpy array of the resultant image
     """
-    # Calculate the brightness of each pixel using the luminosity method
-    brightness_img1 = np_img1[..., 0]*0.2989 + np_img1[..., 1]*0.5870 + np_img1[..., 2]*0.1140
-    brightness_img2 = np_img2[..., 0]*0.2989 + np_img2[..., 1]*0.5870 + np_img2[..., 2]*0.1140
-
     # Create a mask where the brightness of img1 is greater than img2
-    mask = brightness_img1 > brightness_img2
+    mask = (_luminance(np_img1) > _luminance(np_img2))[..., np.newaxis]
 
-    # Initialize an empty image array with the same shape and type as np_img1/np_img2
-    result_image = np.zeros_like(np_img1)
+    if out is None:
+        # If img1 is brighter, take from img1, else take from img2
+        return np.where(mask, np_img1, np_img2).astype(np.uint8, copy=False)
 
-    # Use the mask to select pixels from np_img1 and np_img2
-    result_image[mask] = np_img1[mask]    # If img1 is brighter, take from img1
-    result_image[~mask] = np_img2[~mask]  # Else, take from img2
+    if out is np_img1:
+        np.copyto(out, np_img2, where=~mask, casting='unsafe')
+    elif out is np_img2:
+        np.copyto(out, np_img1, where=mask, casting='unsafe')
+    else:
+        np.copyto(out, np_img2, casting='unsafe')
+        np.copyto(out, np_img1, where=mask, casting='unsafe')
 
-    # Convert the result to uint8 if needed
-    result_image_uint8 = result_image.astype(np.uint8)
+    return out
 
-    return result_image_uint8
-            
-    
+
+# Fixed-point (x 2**16) luminosity weights; 255 * 65536 still fits comfortably in int32
+FIXED_LUMINANCE_WEIGHTS = (19589, 38470, 7471)
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.wmv', '.mpg', '.mpeg')
+
+def _fixed_luminance(np_img, out, scratch):
+    """
+    Integer luminance of an (H, W, 3) uint8 image, written into the int32 'out' buffer.
+    """
+    w_r, w_g, w_b = FIXED_LUMINANCE_WEIGHTS
+    np.multiply(np_img[..., 0], w_r, out=out, dtype=np.int32)
+    np.multiply(np_img[..., 1], w_g, out=scratch, dtype=np.int32)
+    out += scratch
+    np.multiply(np_img[..., 2], w_b, out=scratch, dtype=np.int32)
+    out += scratch
+    return out
+
+def _iterate_frames(frames):
+    """
+    Yield RGB uint8 frames from a video file, a directory, a glob pattern, or an iterable
+    of image paths / arrays / PIL Images.
+    """
+    if isinstance(frames, str):
+        if frames.lower().endswith(VIDEO_EXTENSIONS):
+            capture = cv2.VideoCapture(frames)
+            if not capture.isOpened():
+                raise FileNotFoundError(f"Could not open video: {frames}")
+            try:
+                while True:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+            finally:
+                capture.release()
+            return
+
+        pattern = os.path.join(frames, '*') if os.path.isdir(frames) else frames
+        frames = sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+    for frame in frames:
+        if isinstance(frame, str):
+            frame = cv2.imread(frame)
+            if frame is None:
+                raise FileNotFoundError("File not found or unsupported format while stacking frames.")
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+        elif isinstance(frame, Image.Image):
+            frame = np.asarray(frame.convert('RGB'))
+        yield frame
+
+def _save_checkpoint(image, checkpoint_path):
+    # Write to a side file first so an interrupted save never clobbers the last good checkpoint
+    root, extension = os.path.splitext(checkpoint_path)
+    partial_path = f"{root}.partial{extension}"
+    cv2.imwrite(partial_path, cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    os.replace(partial_path, checkpoint_path)
+
+def StackBrighterImages(frames=None, workers=1, tile_rows=256, checkpoint_path=None, checkpoint_every=100, verbose=True):
+    """
+    Fold a stream of frames into a single brightest-pixel composite (star trails, long exposures).
+
+    Equivalent to calling create_brighter_image pairwise over all frames, but the composite and its
+    luminance live in buffers allocated once, luminance is computed in integer fixed point, and each
+    frame is merged in row tiles that can run on several threads.
+
+    Args:
+        frames (str or iterable): A video file, a directory, a glob pattern (e.g. '/data/night/*.jpg'),
+                                  or an iterable of image paths, RGB uint8 numpy arrays or PIL Images.
+        workers (int): Number of threads merging tiles in parallel, or None for RecommendWorkers('cpu').
+                       Defaults to 1.
+        tile_rows (int): Height of each tile in rows. Defaults to 256.
+        checkpoint_path (str): Optional image path where the partial composite is saved periodically.
+        checkpoint_every (int): Save a checkpoint every this many frames. Defaults to 100.
+        verbose (bool): Whether to display verbose messages. Defaults to True.
+
+    Returns:
+        numpy.ndarray: The RGB uint8 composite, or None if there were no frames.
+    """
+    caller_filename, caller_line = get_caller_info()
+
+    if frames is None:
+        msg = "The following input(s) /argument(s) are missing: frames"
+        HandleError(msg, caller_filename, caller_line)
+
+    if workers is None:
+        from .abdparallel import RecommendWorkers
+        workers = RecommendWorkers('cpu')
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        composite = None
+        count = 0
+
+        for frame in _iterate_frames(frames):
+            if frame.ndim != 3 or frame.shape[2] != 3:
+                msg = "Frames must be RGB images with three dimensions [height, width, channels]."
+                HandleError(msg, caller_filename, caller_line)
+            if frame.dtype != np.uint8:
+                # The masked copy below only writes into the composite in place for matching uint8 frames
+                msg = f"Frames must be uint8 RGB images, got {frame.dtype}."
+                HandleError(msg, caller_filename, caller_line)
+
+            if composite is None:
+                # Allocate the accumulator and all scratch space once, from the first frame
+                height, width = frame.shape[:2]
+                composite = frame.copy()
+                composite_luminance = np.empty((height, width), dtype=np.int32)
+                frame_luminance = np.empty((height, width), dtype=np.int32)
+                scratch = np.empty((height, width), dtype=np.int32)
+                brighter = np.empty((height, width), dtype=bool)
+                _fixed_luminance(composite, composite_luminance, scratch)
+                tiles = [slice(row, min(row + tile_rows, height)) for row in range(0, height, tile_rows)]
+
+                def merge_tile(rows, frame):
+                    _fixed_luminance(frame[rows], frame_luminance[rows], scratch[rows])
+                    np.greater(frame_luminance[rows], composite_luminance[rows], out=brighter[rows])
+                    # Masked copy in place; much faster than np.copyto(where=) for 3-channel images
+                    cv2.copyTo(frame[rows], brighter[rows].view(np.uint8), composite[rows])
+                    np.maximum(composite_luminance[rows], frame_luminance[rows], out=composite_luminance[rows])
+
+            elif frame.shape != composite.shape:
+                msg = f"Frame {count} has shape {frame.shape}, expected {composite.shape}."
+                HandleError(msg, caller_filename, caller_line)
+
+            else:
+                if executor is None:
+                    for rows in tiles:
+                        merge_tile(rows, frame)
+                else:
+                    list(executor.map(lambda rows: merge_tile(rows, frame), tiles))
+
+            count += 1
+            if checkpoint_path and count % checkpoint_every == 0:
+                _save_checkpoint(composite, checkpoint_path)
+                if verbose:
+                    msg = f"Saved checkpoint after {count} frames to '{checkpoint_path}'."
+                    ShowInfo(msg, caller_filename, caller_line)
+
+        if composite is None:
+            if verbose:
+                ShowWarning("No frames found to stack.", caller_filename, caller_line)
+            return None
+
+        if checkpoint_path:
+            _save_checkpoint(composite, checkpoint_path)
+        if verbose:
+            msg = f"Stacked {count} frames into a {composite.shape[1]}x{composite.shape[0]} composite."
+            ShowInfo(msg, caller_filename, caller_line)
+
+        return composite
+
+    except Exception as e:
+        msg = f"Error stacking images: {str(e)}"
+        HandleError(msg, caller_filename, caller_line)
+        return None
+
+    finally:
+        if executor is not None:
+            executor.shutdown()
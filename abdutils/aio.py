@@ -0,0 +1,177 @@
+# https://github.com/abdkhanstd/abdutils
+"""
+Awaitable versions of the abdutils file and image functions, for asyncio programs.
+
+Each call runs the regular function on a shared, bounded thread pool and raises
+AbdutilsError instead of printing the error and exiting (which would stop the event loop).
+At most 'limit' calls run at the same time per event loop (see Configure); pass your own
+asyncio.Semaphore as 'semaphore=' for a tighter limit on a group of calls.
+
+Cancelling a task that is still waiting for a slot or a thread means the call never runs. A call
+that has already started in a thread finishes there, and its result is dropped.
+
+ReadFile and WriteFile keep a position per file path (like the regular functions), so calls on
+the same path are run one after another, in the order they were awaited.
+
+Example:
+    from abdutils import aio
+
+    async def ingest(paths):
+        images = await aio.Map(aio.ReadImage, paths)
+        await asyncio.gather(*(aio.SaveImage(image, path + '.png') for image, path in zip(images, paths)))
+"""
+import asyncio
+import contextlib
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from . import abdutil
+from .abdutil import AbdutilsError, RaiseErrors
+
+__all__ = ['AbdutilsError', 'Configure', 'Run', 'Map', 'ReadFile', 'WriteFile', 'ReadImage',
+           'SaveImage', 'Copy', 'Move']
+
+_executor = None
+_max_workers = None
+_limit = None
+_semaphores = weakref.WeakKeyDictionary()
+_path_locks = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def Configure(max_workers=None, limit=None):
+    """
+    Set the size of the shared thread pool and the per-loop limit of concurrent calls.
+    Takes effect for calls made afterwards.
+
+    Args:
+        max_workers (int): Threads in the shared pool. Defaults to RecommendWorkers('io').
+        limit (int): Calls allowed to run at once per event loop. Defaults to 'max_workers'.
+    """
+    global _executor, _max_workers, _limit
+    with _lock:
+        previous, _executor = _executor, None
+        _max_workers, _limit = max_workers, limit
+        _semaphores.clear()
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def _get_executor():
+    global _executor, _max_workers
+    with _lock:
+        if _executor is None:
+            if _max_workers is None:
+                from .abdparallel import RecommendWorkers
+                _max_workers = RecommendWorkers('io')
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix='abdutils-aio')
+        return _executor
+
+
+def _get_semaphore(loop):
+    # asyncio primitives belong to one loop, so every loop gets its own limit
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        _get_executor()
+        semaphore = _semaphores.setdefault(loop, asyncio.Semaphore(_limit or _max_workers))
+    return semaphore
+
+
+@contextlib.asynccontextmanager
+async def _path_lock(file_path):
+    # One lock per path and loop: ReadFile/WriteFile share abdutil's unlocked file positions.
+    # Entries count their holder and waiters and are dropped with the last one, so a program
+    # touching many paths does not keep a lock for each of them.
+    locks = _path_locks.setdefault(asyncio.get_running_loop(), {})
+    entry = locks.get(file_path)
+    if entry is None:
+        entry = locks[file_path] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del locks[file_path]
+
+
+def _call_raising(func, args, kwargs):
+    with RaiseErrors():
+        return func(*args, **kwargs)
+
+
+async def Run(func, *args, semaphore=None, **kwargs):
+    """
+    Run any abdutils (or other blocking) function on the shared pool, with errors raised as
+    AbdutilsError.
+
+    Example:
+        edges = await aio.Run(abdutils.DetectEdgesInImage, image, method='sobel', verbose=False)
+    """
+    loop = asyncio.get_running_loop()
+    async with semaphore or _get_semaphore(loop):
+        call = functools.partial(_call_raising, func, args, kwargs)
+        return await loop.run_in_executor(_get_executor(), call)
+
+
+async def Map(func, items, limit=None):
+    """
+    Await func(item) for every item, at most 'limit' at a time, and return the results in order.
+    The first error cancels the calls that have not started yet and is raised.
+
+    Args:
+        func (coroutine function): One of the functions of this module, e.g. aio.ReadImage.
+        items (iterable): The arguments, one per call.
+        limit (int): Calls in flight at once. Defaults to the module limit.
+    """
+    semaphore = asyncio.Semaphore(limit) if limit else None
+    tasks = [asyncio.ensure_future(func(item, semaphore=semaphore) if semaphore else func(item)) for item in items]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def ReadFile(file_path, semaphore=None):
+    """Awaitable ReadFile: the next line of the file, or None at the end. Calls on one path run in order."""
+    async with _path_lock(file_path):
+        return await Run(abdutil.ReadFile, file_path, semaphore=semaphore)
+
+
+async def WriteFile(file_path, lines, semaphore=None):
+    """Awaitable WriteFile. Calls on one path run in order."""
+    async with _path_lock(file_path):
+        return await Run(abdutil.WriteFile, file_path, lines, semaphore=semaphore)
+
+
+async def ReadImage(image_path, mode='RGB', method='auto', semaphore=None):
+    """Awaitable ReadImage. PIL images are loaded before returning, so no file I/O is left for the loop."""
+    return await Run(_read_image_loaded, image_path, mode, method, semaphore=semaphore)
+
+
+def _read_image_loaded(image_path, mode, method):
+    image = abdutil.ReadImage(image_path, mode=mode, method=method)
+    if hasattr(image, 'load'):
+        # PIL decodes lazily; do it here rather than on first use in the event loop thread
+        image.load()
+    return image
+
+
+async def SaveImage(image, save_path, method='auto', semaphore=None):
+    """Awaitable SaveImage. Returns True once the file is written."""
+    return await Run(abdutil.SaveImage, image, save_path, method, semaphore=semaphore)
+
+
+async def Copy(src_path, dest_path, verbose=False, semaphore=None):
+    """Awaitable Copy (quiet by default)."""
+    return await Run(abdutil.Copy, src_path, dest_path, verbose, semaphore=semaphore)
+
+
+async def Move(src_path, dest_path, verbose=False, semaphore=None):
+    """Awaitable Move (quiet by default)."""
+    return await Run(abdutil.Move, src_path, dest_path, verbose, semaphore=semaphore)
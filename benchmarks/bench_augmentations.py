@@ -0,0 +1,38 @@
+# Time the weather augmentations on a batch of synthetic images with the NumPy/OpenCV
+# implementations and (if installed) the imgaug backend, plus the cost of importing imgaug:
+#   python benchmarks/bench_augmentations.py
+import sys
+import time
+
+import numpy as np
+
+from abdutils.abdaugs import SnowAugmentation, RainAugmentation, FogAugmentation, CloudsAugmentation
+
+
+def timed(augment, batch):
+    augment(batch[:1])  # Warm up
+    start = time.perf_counter()
+    augment(batch)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(count=32, height=256, width=256):
+    batch = np.random.default_rng(0).integers(0, 256, size=(count, height, width, 3), dtype=np.uint8)
+
+    start = time.perf_counter()
+    try:
+        import imgaug.augmenters  # noqa: F401
+        print(f"import imgaug: {(time.perf_counter() - start) * 1000:.0f} ms")
+    except ImportError:
+        print("imgaug is not installed, only the numpy backend is timed")
+
+    print(f"{count} images {width}x{height}, probability=1.0")
+    print(f"{'augmentation':<22} {'numpy (ms)':>11} {'imgaug (ms)':>12}")
+    for augmentation in (SnowAugmentation, RainAugmentation, FogAugmentation, CloudsAugmentation):
+        native = timed(augmentation(probability=1.0), batch)
+        reference = timed(augmentation(probability=1.0, backend='imgaug'), batch) if 'imgaug' in sys.modules else float('nan')
+        print(f"{augmentation.__name__:<22} {native:11.1f} {reference:12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# Time a per-frame ResizeImage -> ConvertToGrayscale -> ApplyFilter loop with and
+# without a BufferPool, on synthetic frames:  python benchmarks/bench_buffer_pool.py
+import time
+
+import numpy as np
+
+import abdutils as abd
+
+
+KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
+
+
+def process(frame, size, pool=None):
+    small = abd.ResizeImage(frame, size, verbose=False, interpolation='CV_LINEAR', pool=pool)
+    sharp = abd.ApplyFilter(small, KERNEL, pool=pool)
+    return abd.ConvertToGrayscale(sharp, pool=pool)
+
+
+def main(frames=300, shape=(1080, 1920, 3), size=(1280, 720)):
+    frame = np.random.default_rng(0).integers(0, 256, size=shape, dtype=np.uint8)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        process(frame, size)
+    plain = time.perf_counter() - start
+
+    pool = abd.BufferPool()
+    start = time.perf_counter()
+    for _ in range(frames):
+        with pool:
+            process(frame, size, pool)
+    pooled = time.perf_counter() - start
+
+    print(f"{frames} frames {shape[1]}x{shape[0]} -> {size[0]}x{size[1]}")
+    print(f"  fresh arrays  {plain * 1000 / frames:7.2f} ms/frame")
+    print(f"  BufferPool    {pooled * 1000 / frames:7.2f} ms/frame ({plain / pooled:.2f}x)")
+    print(f"  {pool.Stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Chain the weather augmentations by hand on PIL images (each one converting PIL -> array -> PIL)
+# versus one Compose call, and Compose.Map across worker processes, after checking that nested
+# Compose/RandomChoice give the same result for any worker count:
+#   python benchmarks/bench_compose.py
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from abdutils.abdaugs import Compose, RandomChoice, FogAugmentation, RainAugmentation, SnowAugmentation, CloudsAugmentation
+
+
+def check_nested(arrays):
+    nested = Compose([Compose([FogAugmentation(0.5), RainAugmentation(0.5)]),
+                      RandomChoice([SnowAugmentation(0.1), Compose([CloudsAugmentation(1.0)])])], seed=0)
+    single = nested.Map(arrays[:8], workers=1, seed=1)
+    assert np.array_equal(single, nested.Map(arrays[:8], workers=2, seed=1)), "nested Compose is not reproducible"
+    assert (single != arrays[:8]).any(axis=(1, 2, 3)).all(), "nested RandomChoice left an image untouched"
+
+
+def main(count=64, height=256, width=256):
+    arrays = np.random.default_rng(0).integers(0, 256, size=(count, height, width, 3), dtype=np.uint8)
+    images = [Image.fromarray(array) for array in arrays]
+    transforms = [FogAugmentation(0.3, seed=0), RainAugmentation(0.3, seed=1),
+                  SnowAugmentation(0.3, seed=2), CloudsAugmentation(0.3, seed=3)]
+    weather = Compose(transforms, seed=0)
+    check_nested(arrays)
+
+    start = time.perf_counter()
+    for image in images:
+        for transform in transforms:
+            image = transform(image)
+    chained = time.perf_counter() - start
+
+    start = time.perf_counter()
+    weather(images)
+    composed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    weather(arrays)
+    batched = time.perf_counter() - start
+
+    workers = os.cpu_count() or 1
+    start = time.perf_counter()
+    weather.Map(arrays, workers=workers)
+    mapped = time.perf_counter() - start
+
+    print(f"{count} images {width}x{height}, 4 transforms at probability 0.3")
+    print(f"  chained by hand (PIL)     {chained * 1000:8.1f} ms")
+    print(f"  Compose (PIL list)        {composed * 1000:8.1f} ms")
+    print(f"  Compose (NHWC array)      {batched * 1000:8.1f} ms")
+    print(f"  Compose.Map ({workers} workers)   {mapped * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# Measure how many bytes are allocated by NumPy/Python at each step of a
+# ReadImage -> PIL2CV2 -> CV2PIL -> SaveImage round trip (and the cv2-only path).
+# Runs offline on a synthetic image:  python benchmarks/bench_conversions.py
+#
+# tracemalloc sees NumPy buffers, OpenCV outputs (allocated through NumPy) and
+# bytes objects, but not Pillow's internal image storage (CV2PIL always makes
+# exactly one such copy for color images).
+import os
+import tempfile
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+import abdutils as abd
+
+
+def measure(label, func, *args, **kwargs):
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(*args, **kwargs)
+    allocated = tracemalloc.get_traced_memory()[1] - before
+    print(f"  {label:<28} {allocated / 2**20:8.1f} MB")
+    return result, allocated
+
+
+def main(width=4000, height=3000):
+    folder = tempfile.mkdtemp()
+    array = np.random.default_rng(0).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    Image.fromarray(array).save(os.path.join(folder, 'input.png'))
+    del array
+    image_bytes = width * height * 3
+    print(f"Image: {width}x{height} RGB ({image_bytes / 2**20:.1f} MB)")
+
+    tracemalloc.start()
+
+    print("PIL round trip")
+    total = 0
+    image, allocated = measure('ReadImage (PIL)', abd.ReadImage, os.path.join(folder, 'input.png'))
+    total += allocated
+    bgr, allocated = measure('PIL2CV2', abd.PIL2CV2, image)
+    total += allocated
+    image, allocated = measure('CV2PIL', abd.CV2PIL, bgr)
+    total += allocated
+    _, allocated = measure('SaveImage (PIL)', abd.SaveImage, image, os.path.join(folder, 'out.png'))
+    total += allocated
+    print(f"  {'total':<28} {total / 2**20:8.1f} MB ({total / image_bytes:.1f}x image size)")
+
+    print("cv2 round trip")
+    total = 0
+    image, allocated = measure('ReadImage (CV2)', abd.ReadImage, os.path.join(folder, 'input.png'), method='CV2')
+    total += allocated
+    _, allocated = measure('SaveImage (CV2)', abd.SaveImage, image, os.path.join(folder, 'out.png'))
+    total += allocated
+    print(f"  {'total':<28} {total / 2**20:8.1f} MB ({total / image_bytes:.1f}x image size)")
+
+    tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Benchmark: ImageOps chain vs. the equivalent chain of individual abdutils calls.
+# Runs offline on a synthetic image:  python benchmarks/bench_imageops.py
+import time
+
+import numpy as np
+from PIL import Image
+
+import abdutils as abd
+
+
+def make_image(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    array = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    return Image.fromarray(array)
+
+
+def time_it(func, repeat):
+    func()  # Warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def chain_of_calls(image):
+    image = abd.ConvertToRGB(image)
+    image = abd.GaussianBlurImage(image, sigma=2.0, verbose=False)
+    image = abd.SharpenImage(image, factor=2.0, verbose=False)
+    return abd.DetectEdgesInImage(image, method='sobel', verbose=False)
+
+
+def main():
+    ops = abd.ImageOps().ConvertToRGB().GaussianBlur(2.0).Sharpen(2.0).DetectEdges('sobel')
+
+    print(f"{'size':>12} {'calls (ms)':>12} {'ImageOps (ms)':>14} {'speedup':>8}")
+    for width, height in [(640, 480), (1920, 1080), (3840, 2160)]:
+        image = make_image(width, height)
+        repeat = 10 if width < 3000 else 3
+        baseline = time_it(lambda: chain_of_calls(image), repeat)
+        fused = time_it(lambda: ops(image), repeat)
+        print(f"{width:>5}x{height:<6} {baseline * 1000:>12.1f} {fused * 1000:>14.1f} {baseline / fused:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# Compare the weather augmentations with their WeatherOverlayBank versions on a batch of
+# synthetic images (probability 1). The one-off bank generation is reported separately:
+#   python benchmarks/bench_overlay_bank.py
+import time
+
+import numpy as np
+
+from abdutils.abdaugs import (SnowAugmentation, RainAugmentation, FogAugmentation,
+                              CloudsAugmentation, WeatherOverlayBank)
+
+
+def main(count=64, height=256, width=256, layers=16):
+    batch = np.random.default_rng(0).integers(0, 256, size=(count, height, width, 3), dtype=np.uint8)
+
+    print(f"{count} images {width}x{height}, bank of {layers} layers")
+    print(f"{'augmentation':<20} {'direct (ms)':>12} {'bank build (ms)':>16} {'bank (ms)':>10} {'speedup':>8}")
+    for augmentation in (SnowAugmentation, RainAugmentation, FogAugmentation, CloudsAugmentation):
+        augment = augmentation(probability=1.0)
+        start = time.perf_counter()
+        augment(batch)
+        direct = time.perf_counter() - start
+
+        bank = WeatherOverlayBank(augment, layers=layers)
+        start = time.perf_counter()
+        bank(batch[:1])
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bank(batch)
+        banked = time.perf_counter() - start
+
+        print(f"{augmentation.__name__:<20} {direct * 1000:12.1f} {build * 1000:16.1f} {banked * 1000:10.1f} "
+              f"{direct / banked:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
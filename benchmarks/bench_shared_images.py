@@ -0,0 +1,56 @@
+# Hand resized frames from worker processes back to the parent, once pickled through the
+# process pool and once through a SharedImageRing:  python benchmarks/bench_shared_images.py
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import abdutils as abd
+
+
+ring = None
+frame = None
+
+
+def init(shared_ring, shape):
+    global ring, frame
+    ring = shared_ring
+    frame = np.random.default_rng(0).integers(0, 256, size=shape, dtype=np.uint8)
+
+
+def pickled(size):
+    return abd.ResizeImage(frame, size, verbose=False, interpolation='CV_LINEAR')
+
+
+def shared(size):
+    return ring.Handle(abd.ResizeImage(frame, size, verbose=False, interpolation='CV_LINEAR', pool=ring))
+
+
+def run(task, frames, size, workers, shape, shared_ring=None):
+    checksum = 0
+    with ProcessPoolExecutor(workers, initializer=init, initargs=(shared_ring, shape)) as executor:
+        executor.submit(task, size).result()        # start the workers before timing
+        start = time.perf_counter()
+        for future in as_completed([executor.submit(task, size) for _ in range(frames)]):
+            result = future.result()
+            if shared_ring is not None:
+                checksum += int(shared_ring.Get(result)[0, 0, 0])
+                shared_ring.Release(result)
+            else:
+                checksum += int(result[0, 0, 0])
+        return time.perf_counter() - start, checksum
+
+
+def main(frames=200, shape=(2160, 3840, 3), size=(1920, 1080), workers=2, slots=8):
+    plain, plain_sum = run(pickled, frames, size, workers, shape)
+    with abd.SharedImageRing(slots=slots, shape=(size[1], size[0], 3)) as shared_ring:
+        ring_seconds, ring_sum = run(shared, frames, size, workers, shape, shared_ring)
+    assert plain_sum == ring_sum
+
+    print(f"{frames} frames {shape[1]}x{shape[0]} -> {size[0]}x{size[1]}, {workers} workers")
+    print(f"  pickled           {frames / plain:8.1f} frames/s")
+    print(f"  SharedImageRing   {frames / ring_seconds:8.1f} frames/s ({plain / ring_seconds:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# Benchmark suite: images/sec and peak memory of the weather augmentations and the core image
+# ops, for several resolutions and for PIL and ndarray inputs, on synthetic images (offline).
+# Writes a JSON report that can be diffed between versions:
+#
+#   python benchmarks/run_suite.py --output report.json
+#   python benchmarks/run_suite.py --quick --compare report.json
+#
+# Timing and memory are measured in separate passes, as tracemalloc slows Python code down.
+# Peak memory is the largest amount of memory traced (NumPy, OpenCV outputs, Python objects)
+# above the baseline during one call; Pillow's internal image storage is not visible to it.
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import abdutils as abd
+from abdutils import abdaugs
+
+SIZES = [(256, 256), (640, 480), (1920, 1080)]
+QUICK_SIZES = [(256, 256), (640, 480)]
+
+SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
+BLUR_KERNEL = np.ones((5, 5), dtype=np.float32) / 25.0
+
+
+def make_image(width, height, kind, seed=0):
+    array = np.random.default_rng(seed).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    return Image.fromarray(array) if kind == 'PIL' else array
+
+
+def cases(include_imgaug):
+    """
+    (name, function, input kinds) for every benchmarked operation.
+    """
+    suite = [
+        ('ResizeImage', lambda image: abd.ResizeImage(
+            image, (_width(image) // 2, _height(image) // 2), verbose=False,
+            interpolation='IBILINEAR' if isinstance(image, Image.Image) else 'CV_LINEAR'), ('PIL', 'ndarray')),
+        ('ConvertToGrayscale', lambda image: abd.ConvertToGrayscale(image), ('PIL', 'ndarray')),
+        ('GaussianBlurImage', lambda image: abd.GaussianBlurImage(image, sigma=2.0, verbose=False), ('PIL', 'ndarray')),
+        ('DetectEdgesInImage', lambda image: abd.DetectEdgesInImage(image, method='sobel', verbose=False), ('PIL', 'ndarray')),
+        ('ConvolveImage', lambda image: abd.ConvolveImage(image, BLUR_KERNEL, verbose=False, boundary='symm'), ('PIL', 'ndarray')),
+        ('ApplyFilter', lambda image: abd.ApplyFilter(image, SHARPEN_KERNEL), ('PIL', 'ndarray')),
+    ]
+    augmentations = [abdaugs.SnowAugmentation, abdaugs.RainAugmentation,
+                     abdaugs.FogAugmentation, abdaugs.CloudsAugmentation]
+    for augmentation in augmentations:
+        augment = augmentation(probability=1.0, seed=0)
+        suite.append((augmentation.__name__, augment, ('PIL', 'ndarray')))
+        if include_imgaug:
+            augment = augmentation(probability=1.0, seed=0, backend='imgaug')
+            suite.append((augmentation.__name__ + '[imgaug]', augment, ('PIL', 'ndarray')))
+    return suite
+
+
+def _width(image):
+    return image.width if isinstance(image, Image.Image) else image.shape[1]
+
+
+def _height(image):
+    return image.height if isinstance(image, Image.Image) else image.shape[0]
+
+
+def measure_time(func, image, min_time, min_repeats):
+    func(image)  # Warm up
+    repeats = 0
+    start = time.perf_counter()
+    while True:
+        func(image)
+        repeats += 1
+        elapsed = time.perf_counter() - start
+        if repeats >= min_repeats and elapsed >= min_time:
+            return elapsed / repeats, repeats
+
+
+def measure_memory(func, image):
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = func(image)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        del result
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def environment():
+    return {
+        'abdutils': getattr(sys.modules['abdutils.abdutil'], '__version__', None),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'pillow': Image.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'opencv_threads': cv2.getNumThreads(),
+    }
+
+
+def run(sizes, min_time, min_repeats, include_imgaug, only=None):
+    results = []
+    for name, func, kinds in cases(include_imgaug):
+        if only and not any(pattern.lower() in name.lower() for pattern in only):
+            continue
+        for width, height in sizes:
+            for kind in kinds:
+                image = make_image(width, height, kind)
+                seconds, repeats = measure_time(func, image, min_time, min_repeats)
+                peak = measure_memory(func, image)
+                results.append({
+                    'name': name,
+                    'input': kind,
+                    'size': f"{width}x{height}",
+                    'images_per_sec': round(1.0 / seconds, 2),
+                    'ms_per_image': round(seconds * 1000, 3),
+                    'peak_memory_bytes': int(peak),
+                    'repeats': repeats,
+                })
+                print(f"{name:<28} {kind:<8} {width:>5}x{height:<5} {1.0 / seconds:10.1f} img/s "
+                      f"{peak / 2**20:9.1f} MB peak")
+    return results
+
+
+def compare(results, previous_path):
+    with open(previous_path) as handle:
+        previous = {(item['name'], item['input'], item['size']): item for item in json.load(handle)['results']}
+    print(f"\nCompared with {previous_path} (ratio > 1 means faster / less memory now):")
+    for item in results:
+        before = previous.get((item['name'], item['input'], item['size']))
+        if before is None:
+            continue
+        speed = item['images_per_sec'] / before['images_per_sec']
+        memory = before['peak_memory_bytes'] / item['peak_memory_bytes'] if item['peak_memory_bytes'] else float('nan')
+        print(f"{item['name']:<28} {item['input']:<8} {item['size']:>11} speed {speed:6.2f}x  memory {memory:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="abdutils benchmark suite")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    parser.add_argument('--compare', help="Print ratios against a previous JSON report")
+    parser.add_argument('--quick', action='store_true', help="Small sizes and short timings")
+    parser.add_argument('--imgaug', action='store_true', help="Also time the augmentations with backend='imgaug'")
+    parser.add_argument('--only', nargs='*', help="Only run cases whose name contains one of these strings")
+    args = parser.parse_args()
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    min_time, min_repeats = (0.1, 2) if args.quick else (0.5, 3)
+
+    results = run(sizes, min_time, min_repeats, args.imgaug, args.only)
+    report = {'environment': environment(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+        print(f"\nReport written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -25,5 +25,9 @@ setup(
         'numpy',
         'GPUtil'
     ],
+    extras_require={
+        # Only needed for the weather augmentations' backend='imgaug'
+        'imgaug': ['imgaug'],
+    },
 )
 